@@ -0,0 +1,45 @@
+import os
+
+
+# --------------------------------------------------
+# Generated assets
+# --------------------------------------------------
+
+GEN_DIR = os.path.join("data", "gen")
+
+# Android density buckets and their scale over 160 dpi
+DENSITIES = [
+    ("mdpi", 1.0),
+    ("hdpi", 1.5),
+    ("xhdpi", 2.0),
+    ("xxhdpi", 3.0),
+    ("xxxhdpi", 4.0),
+]
+
+# Atlas key -> (source image, largest size it is shown at in dp)
+UI_IMAGES = {
+    "logo": (os.path.join("data", "icon_1024.png"), 120),
+}
+
+SPLASH_MAX = 1280
+
+
+def density_bucket(density):
+    """Smallest bucket that is at least as dense as the screen."""
+    for bucket, scale in DENSITIES:
+        if scale >= density - 0.01:
+            return bucket
+    return DENSITIES[-1][0]
+
+
+def asset_source(name, density, base_dir=""):
+    """Kivy source string for a UI image at the screen's density.
+
+    Falls back to the full-size original when the asset build has not
+    been run, which is the normal state of a desktop checkout.
+    """
+    bucket = density_bucket(density)
+    atlas = os.path.join(GEN_DIR, f"ui-{bucket}")
+    if os.path.exists(os.path.join(base_dir, f"{atlas}.atlas")):
+        return f"atlas://{atlas.replace(os.sep, '/')}/{name}"
+    return UI_IMAGES[name][0].replace(os.sep, "/")
@@ -0,0 +1,190 @@
+"""Headless UI latency benchmark.
+
+Starts the real DominoApp against a throwaway data directory with no
+visible window, drives its screens the way taps would and times each
+interaction up to the end of the frame that shows its result:
+
+    python bench.py --adds 2000 --history 100,1000,5000 --json bench.json
+
+Reports p50/p95/p99 in milliseconds per interaction. Needs Kivy and
+KivyMD but no display: unless SDL_VIDEODRIVER is already set, SDL's
+offscreen driver renders through EGL (Mesa's libEGL is enough). The
+dummy driver cannot create a GL context, so Kivy cannot open a window
+with it. Where EGL is missing, run under a virtual X server instead:
+
+    SDL_VIDEODRIVER=x11 xvfb-run -a python bench.py
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault("KIVY_NO_ARGS", "1")
+os.environ.setdefault("KIVY_NO_CONSOLELOG", "1")
+os.environ.setdefault("SDL_VIDEODRIVER", "offscreen")
+
+
+# --------------------------------------------------
+# Timing
+# --------------------------------------------------
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    k = (len(ordered) - 1) * pct / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+class Recorder:
+    def __init__(self):
+        self.samples = {}
+
+    def add(self, name, seconds):
+        self.samples.setdefault(name, []).append(seconds * 1000.0)
+
+    def summary(self):
+        return {
+            name: {
+                "n": len(ms),
+                "p50": round(percentile(ms, 50), 3),
+                "p95": round(percentile(ms, 95), 3),
+                "p99": round(percentile(ms, 99), 3),
+                "max": round(max(ms), 3),}
+            for name, ms in self.samples.items()}
+
+    def print(self, out=print):
+        out(f"{'interaction':<24} {'n':>6} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}  (ms)")
+        for name, row in self.summary().items():
+            out(f"{name:<24} {row['n']:>6} {row['p50']:>9.2f} {row['p95']:>9.2f} "
+                f"{row['p99']:>9.2f} {row['max']:>9.2f}")
+
+
+# --------------------------------------------------
+# Synthetic data
+# --------------------------------------------------
+
+def synthetic_games(names, count, seed=0):
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1, 18, 0)
+    games = []
+    for i in range(count):
+        seated = rng.sample(names, rng.randint(2, min(8, len(names))))
+        rounds = []
+        totals = {n: 0 for n in seated}
+        while max(totals.values()) < 300:
+            name = rng.choice(seated)
+            pts = rng.choice((5, 10, 15, 20, 25))
+            totals[name] += pts
+            rounds.append([name, pts])
+        games.append({
+            "date": (start + timedelta(minutes=37 * i)).isoformat(),
+            "totals": totals,
+            "winner": max(totals.items(), key=lambda x: x[1])[0],
+            "finished": True,
+            "rounds": rounds,})
+    return games
+
+
+# --------------------------------------------------
+# Driving the app
+# --------------------------------------------------
+
+def run(adds, history_sizes, edits, seed=0):
+    workdir = tempfile.mkdtemp(prefix="domino-bench-")
+    os.chdir(workdir)
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+    from kivy.base import EventLoop
+    from kivy.uix.screenmanager import NoTransition
+
+    import main
+    from models import GameScore, Player
+
+    app = main.DominoApp()
+    app._run_prepare()
+    sm = app.root
+    sm.transition = NoTransition()
+    rec = Recorder()
+
+    def frame():
+        # One full frame: clock callbacks, layout and the canvas draw
+        EventLoop.idle()
+        while sm.transition.is_active:
+            EventLoop.idle()
+
+    def timed(name, action):
+        t0 = time.perf_counter()
+        action()
+        frame()
+        rec.add(name, time.perf_counter() - t0)
+
+    names = [f"Player {i:02d}" for i in range(1, 13)]
+    for name in names:
+        app.players[name] = Player(name)
+    app.save_players()
+    app.index_players()
+    frame()
+
+    rng = random.Random(seed)
+    game_screen = sm.get_screen("game")
+    for n in range(2, 9):
+        sm.current = "menu"
+        frame()
+        timed(f"start_game[{n}]", lambda: app.start_game(names[:n]))
+        seated = list(app.current_game.totals)
+        for _ in range(adds // 7):
+            timed(f"add[{n}]", lambda: game_screen.add(rng.choice(seated), rng.choice((5, 10, 20, -5))))
+
+    for size in history_sizes:
+        app.history.apply(synthetic_games(names, size, seed), [], None)
+        # Start each size cold, as after a launch
+        app.history.reload()
+        for _ in range(5):
+            sm.current = "menu"
+            frame()
+
+            def open_history():
+                sm.current = "history"
+
+            timed(f"history[{size}]", open_history)
+
+        games = app.history.all()
+        for _ in range(edits):
+            g = rng.choice(games)
+            app.current_game = GameScore.from_dict(g, app.players)
+            app.editing_id = g["date"]
+            sm.current = "edit"
+            frame()
+            timed(f"save_edit[{size}]", sm.get_screen("edit").save_game)
+
+    app.stop()
+    return rec
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless UI latency benchmark")
+    parser.add_argument("--adds", type=int, default=2000, help="GameScreen.add calls in total")
+    parser.add_argument("--history", default="100,1000,5000",
+                        help="comma separated history sizes to open")
+    parser.add_argument("--edits", type=int, default=20, help="edit saves per history size")
+    parser.add_argument("--json", default=None, help="also write the summary to this file")
+    args = parser.parse_args(argv)
+    sizes = [int(s) for s in args.history.split(",") if s.strip()]
+    out_path = os.path.abspath(args.json) if args.json else None
+    rec = run(args.adds, sizes, args.edits)
+    rec.print()
+    if out_path:
+        with open(out_path, "w", encoding="utf-8") as f:
+            json.dump(rec.summary(), f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
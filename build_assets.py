@@ -0,0 +1,105 @@
+"""Build-time asset pipeline.
+
+Writes density-specific downscales of the large source images into
+data/gen/ and packs the small UI images for each density into a Kivy
+atlas. Run before packaging (the Android workflow does):
+
+    pip install pillow
+    python build_assets.py
+
+Needs Pillow only; Kivy is not imported.
+"""
+import json
+import math
+import os
+import sys
+
+from assets import DENSITIES, GEN_DIR, SPLASH_MAX, UI_IMAGES
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+
+BASE = os.path.dirname(os.path.abspath(__file__))
+ATLAS_MAX = 2048
+PADDING = 2
+
+
+def _resize(img, width, height):
+    img = img.copy()
+    img.thumbnail((width, height), Image.LANCZOS)
+    return img
+
+
+def _pack(images):
+    # Shelf packing, tallest first: fine for the handful of UI images
+    order = sorted(images, key=lambda kv: kv[1].height, reverse=True)
+    # Aim for a roughly square page, never narrower than the widest image
+    area = sum((img.width + PADDING) * (img.height + PADDING) for _, img in order)
+    limit = min(ATLAS_MAX, max(max(img.width for _, img in order), math.isqrt(area)))
+    x = y = shelf = 0
+    width = 0
+    placed = []
+    for name, img in order:
+        if x and x + img.width > limit:
+            x = 0
+            y += shelf + PADDING
+            shelf = 0
+        placed.append((name, img, x, y))
+        width = max(width, x + img.width)
+        x += img.width + PADDING
+        shelf = max(shelf, img.height)
+    height = y + shelf
+    # Power-of-two pages upload cleanly on old GPUs
+    size_w = 1 << (width - 1).bit_length()
+    size_h = 1 << (height - 1).bit_length()
+    return size_w, size_h, placed
+
+
+def build_atlas(bucket, scale, out_dir):
+    images = []
+    for name, (src, size_dp) in UI_IMAGES.items():
+        px = max(1, round(size_dp * scale))
+        with Image.open(os.path.join(BASE, src)) as img:
+            images.append((name, _resize(img.convert("RGBA"), px, px)))
+
+    size_w, size_h, placed = _pack(images)
+    page = Image.new("RGBA", (size_w, size_h), (0, 0, 0, 0))
+    regions = {}
+    for name, img, x, y in placed:
+        page.paste(img, (x, y))
+        # Kivy atlas coordinates start at the bottom-left corner
+        regions[name] = [x, size_h - y - img.height, img.width, img.height]
+
+    base = f"ui-{bucket}"
+    page_name = f"{base}-0.png"
+    page.save(os.path.join(out_dir, page_name), optimize=True)
+    with open(os.path.join(out_dir, f"{base}.atlas"), "w", encoding="utf-8") as f:
+        json.dump({page_name: regions}, f)
+    return page_name
+
+
+def build_splash(out_dir):
+    with Image.open(os.path.join(BASE, "data", "splash.png")) as img:
+        img = _resize(img.convert("RGBA"), SPLASH_MAX, SPLASH_MAX)
+    out = os.path.join(out_dir, "splash.png")
+    img.save(out, optimize=True)
+    return out
+
+
+def main():
+    if Image is None:
+        print("Pillow is required: pip install pillow", file=sys.stderr)
+        return 1
+    out_dir = os.path.join(BASE, GEN_DIR)
+    os.makedirs(out_dir, exist_ok=True)
+    for bucket, scale in DENSITIES:
+        print("atlas", build_atlas(bucket, scale, out_dir))
+    print("splash", build_splash(out_dir))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,7 +8,9 @@ package.name = dominoscores
 package.domain = com.gicki
 
 source.dir = .
-source.include_exts = py,kv,json,png,jpg,ttf,dom
+source.include_exts = py,kv,json,png,jpg,ttf,dom,atlas
+# Full-size originals are replaced by the output of build_assets.py
+source.exclude_patterns = data/icon_1024.png,data/splash.png
 
 version = 0.9.2
 
@@ -22,7 +24,8 @@ fullscreen = 1
 
 # App icon
 icon.filename = %(source.dir)s/data/icon.png
-presplash.filename = %(source.dir)s/data/splash.png
+# Generated by build_assets.py; run it before buildozer
+presplash.filename = %(source.dir)s/data/gen/splash.png
 
 # --------------------------------------------------
 # Android configuration (CLEAN)
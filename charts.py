@@ -0,0 +1,127 @@
+from collections import OrderedDict
+
+from history import game_id
+
+
+# --------------------------------------------------
+# Score progression series
+# --------------------------------------------------
+
+def cumulative_series(game):
+    """Each player's running total as ``[(round, total), ...]``.
+
+    The x axis is the round number across the whole game, so players in
+    the same game line up. Every series starts at (0, 0) and ends at the
+    player's total on the last round; games saved before rounds were kept
+    get a straight line to their final totals. Rounds of players no
+    longer in the totals (renamed or removed by an edit) are left out.
+    """
+    totals = game.get("totals") or {}
+    rounds = game.get("rounds") or ()
+    series = {name: [(0, 0)] for name in totals}
+    running = dict.fromkeys(totals, 0)
+    for i, (name, pts) in enumerate(rounds, start=1):
+        if name not in series:
+            if totals:
+                continue
+            series[name] = [(0, 0)]
+            running[name] = 0
+        running[name] += pts
+        series[name].append((i, running[name]))
+    last = max(len(rounds), 1)
+    for name, points in series.items():
+        final = totals.get(name, running[name])
+        if points[-1] != (last, final):
+            points.append((last, final))
+    return series
+
+
+def lttb(points, threshold):
+    """Largest-Triangle-Three-Buckets downsampling to ``threshold`` points.
+
+    Keeps the first and last point and, from each bucket in between, the
+    point forming the largest triangle with its neighbours, which keeps
+    the peaks and drops a chart's visual shape far less than striding.
+    """
+    n = len(points)
+    if threshold >= n or threshold < 3:
+        return list(points)
+    out = [points[0]]
+    every = (n - 2) / (threshold - 2)
+    a = 0
+    for i in range(threshold - 2):
+        # Average of the next bucket is the third triangle corner
+        start = int((i + 1) * every) + 1
+        end = min(int((i + 2) * every) + 1, n)
+        span = end - start or 1
+        avg_x = sum(p[0] for p in points[start:end]) / span
+        avg_y = sum(p[1] for p in points[start:end]) / span
+
+        lo = int(i * every) + 1
+        hi = int((i + 1) * every) + 1
+        ax, ay = points[a]
+        best = -1.0
+        pick = lo
+        for j in range(lo, hi):
+            x, y = points[j]
+            area = abs((ax - avg_x) * (y - ay) - (ax - x) * (avg_y - ay))
+            if area > best:
+                best = area
+                pick = j
+        out.append(points[pick])
+        a = pick
+    out.append(points[-1])
+    return out
+
+
+class SeriesCache:
+    """Cumulative series per game, and their downsamples per width.
+
+    Least recently used games are dropped past ``max_games``. Attached to
+    a HistoryStore, edited and deleted games are evicted as they change.
+    """
+
+    def __init__(self, max_games=64):
+        self.max_games = max_games
+        self.entries = OrderedDict()
+
+    def attach(self, history):
+        history.subscribe(self.on_history_change, self.invalidate)
+
+    def invalidate(self):
+        self.entries.clear()
+
+    def on_history_change(self, upserts, deletes):
+        for gid in deletes:
+            self._evict(gid)
+        for game in upserts:
+            self._evict(game_id(game))
+
+    def _evict(self, gid):
+        for key in [k for k in self.entries if k[0] == gid]:
+            del self.entries[key]
+
+    def _entry(self, game):
+        # Round count is in the key so a game still being played refreshes
+        key = (game_id(game), len(game.get("rounds") or ()))
+        entry = self.entries.get(key)
+        if entry is None:
+            entry = self.entries[key] = {"series": cumulative_series(game), "sampled": {}}
+            if len(self.entries) > self.max_games:
+                self.entries.popitem(last=False)
+        else:
+            self.entries.move_to_end(key)
+        return entry
+
+    def series(self, game):
+        return self._entry(game)["series"]
+
+    def sampled(self, game, width):
+        """Series downsampled to at most one point per pixel of ``width``."""
+        width = max(3, int(width))
+        entry = self._entry(game)
+        sampled = entry["sampled"].get(width)
+        if sampled is None:
+            sampled = {name: lttb(points, width) for name, points in entry["series"].items()}
+            entry["sampled"] = {width: sampled}
+        return sampled
@@ -0,0 +1,202 @@
+import functools
+import logging
+import os
+import sys
+import time
+import tracemalloc
+from collections import deque
+from logging.handlers import RotatingFileHandler
+
+from history import iter_games
+from models import GameScore
+from store import PlayerStore
+
+
+# --------------------------------------------------
+# Memory report
+# --------------------------------------------------
+
+def _fmt(n):
+    for unit in ("B", "KiB", "MiB"):
+        if abs(n) < 1024 or unit == "MiB":
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
+
+
+def memory_report(players_path, games_path, out=print):
+    """Load the roster and history as model objects and report what they cost.
+
+    Each stage is measured as the growth in memory still held after it,
+    so parser garbage is not counted. Returns the byte counts by stage.
+    """
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        players = PlayerStore(players_path).load()
+        after_players = tracemalloc.get_traced_memory()[0]
+
+        games = []
+        for g in iter_games(games_path):
+            g.pop("rounds", None)
+            games.append(GameScore.from_dict(g, players))
+        after_games = tracemalloc.get_traced_memory()[0]
+
+        # Second streaming pass so rounds are measured on their own
+        n_rounds = 0
+        for game, g in zip(games, iter_games(games_path)):
+            game.rounds = GameScore.from_dict(g).rounds
+            n_rounds += len(game.rounds)
+        after_rounds = tracemalloc.get_traced_memory()[0]
+    finally:
+        if not was_tracing:
+            tracemalloc.stop()
+
+    report = {
+        "players": after_players - before,
+        "games": after_games - after_players,
+        "rounds": after_rounds - after_games,}
+    counts = {"players": len(players), "games": len(games), "rounds": n_rounds}
+    for key, size in report.items():
+        per = size / counts[key] if counts[key] else 0
+        line = f"memory {key:<8} {counts[key]:>8} objects  {_fmt(size):>10}  ({per:.0f} B each)"
+        out(line)
+        logging.info(line)
+    return report
+
+
+# --------------------------------------------------
+# Frame and screen timing
+# --------------------------------------------------
+
+PROFILED_METHODS = ("on_enter", "on_pre_enter", "refresh", "populate", "filter")
+
+
+class FrameProfiler:
+    """Opt-in timing of frames and of each screen's build methods.
+
+    Frame times come from a per-frame Clock callback. Screen methods are
+    wrapped at class level and record wall time plus the number of widgets
+    created during the call. Results go to a rotating perf.log and,
+    optionally, a small overlay in the corner of the window.
+    """
+
+    def __init__(self, log_dir, window=600, slow_ms=33.0, overlay=True):
+        self.frames = deque(maxlen=window)
+        self.calls = {}
+        self.last_call = ""
+        self.slow_ms = slow_ms
+        self.widgets = 0
+        self.show_overlay = overlay
+        self.overlay = None
+        self.log = logging.getLogger("domino.perf")
+        self.log.propagate = False
+        try:
+            os.makedirs(log_dir, exist_ok=True)
+            handler = RotatingFileHandler(
+                os.path.join(log_dir, "perf.log"), maxBytes=256 * 1024, backupCount=2)
+            handler.setFormatter(logging.Formatter("%(asctime)s | %(message)s"))
+            self.log.addHandler(handler)
+            self.log.setLevel(logging.INFO)
+        except Exception:
+            logging.exception("Failed to open perf log")
+
+    def install(self, screen_classes):
+        from kivy.clock import Clock
+        from kivy.uix.widget import Widget
+
+        profiler = self
+        widget_init = Widget.__init__
+
+        def counted_init(widget, **kwargs):
+            profiler.widgets += 1
+            widget_init(widget, **kwargs)
+
+        Widget.__init__ = counted_init
+
+        for cls in screen_classes:
+            for name in PROFILED_METHODS:
+                if name in cls.__dict__:
+                    setattr(cls, name, self._wrap(cls.__name__, name, cls.__dict__[name]))
+
+        Clock.schedule_interval(self._on_frame, 0)
+        Clock.schedule_interval(self._report, 5)
+        if self.show_overlay:
+            Clock.schedule_once(lambda dt: self._add_overlay(), 0)
+            Clock.schedule_interval(self._update_overlay, 0.5)
+
+    def _wrap(self, owner, name, func):
+        label = f"{owner}.{name}"
+
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            widgets = self.widgets
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.record(label, (time.perf_counter() - start) * 1000, self.widgets - widgets)
+        return timed
+
+    def record(self, label, ms, widgets):
+        stats = self.calls.setdefault(label, [0, 0.0, 0.0, 0])
+        stats[0] += 1
+        stats[1] += ms
+        stats[2] = max(stats[2], ms)
+        stats[3] += widgets
+        self.last_call = f"{label} {ms:.0f}ms {widgets}w"
+        level = logging.WARNING if ms >= self.slow_ms else logging.INFO
+        self.log.log(level, f"call {label} {ms:.1f}ms widgets={widgets}")
+
+    def _on_frame(self, dt):
+        self.frames.append(dt * 1000)
+
+    def frame_stats(self):
+        if not self.frames:
+            return {}
+        ordered = sorted(self.frames)
+        n = len(ordered)
+        return {
+            "fps": 1000 * n / sum(ordered) if sum(ordered) else 0,
+            "p50": ordered[n // 2],
+            "p95": ordered[min(n - 1, int(n * 0.95))],
+            "max": ordered[-1],
+            "janky": sum(1 for f in ordered if f >= self.slow_ms),}
+
+    def _report(self, dt):
+        stats = self.frame_stats()
+        if stats:
+            self.log.info(
+                "frames fps={fps:.0f} p50={p50:.1f}ms p95={p95:.1f}ms "
+                "max={max:.1f}ms janky={janky}".format(**stats))
+
+    def _add_overlay(self):
+        from kivy.core.window import Window
+        from kivy.uix.label import Label
+
+        self.overlay = Label(
+            size_hint=(None, None),
+            size=(Window.width, 40),
+            pos=(0, 0),
+            font_size="11sp",
+            color=(1, 1, 0, 0.9),
+            halign="left",
+            valign="bottom",)
+        self.overlay.text_size = self.overlay.size
+        Window.add_widget(self.overlay)
+
+    def _update_overlay(self, dt):
+        if self.overlay is None:
+            return
+        stats = self.frame_stats()
+        if not stats:
+            return
+        self.overlay.text = (
+            f"fps {stats['fps']:.0f}  p95 {stats['p95']:.0f}ms  max {stats['max']:.0f}ms\n"
+            f"{self.last_call}")
+
+
+if __name__ == "__main__":
+    base = sys.argv[1] if len(sys.argv) > 1 else os.getcwd()
+    memory_report(os.path.join(base, "players.dom"), os.path.join(base, "games.dom"))
@@ -0,0 +1,97 @@
+import csv
+import logging
+import os
+
+from history import game_id, iter_games
+
+
+ROW_FIELDS = ("date", "game_id", "player", "score", "winner", "rounds")
+
+
+# --------------------------------------------------
+# Tabular export
+# --------------------------------------------------
+
+def iter_rows(games):
+    """One row per player per game, in the order games are stored."""
+    for g in games:
+        gid = game_id(g)
+        totals = g.get("totals")
+        if not gid or not isinstance(totals, dict):
+            continue
+        date = gid[:10]
+        winner = g.get("winner") or ""
+        rounds = len(g.get("rounds") or ())
+        for player, score in totals.items():
+            yield (date, gid, player, score, winner, rounds)
+
+
+def export_csv(games_path, out_path):
+    count = 0
+    tmp_path = f"{out_path}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(ROW_FIELDS)
+            for row in iter_rows(iter_games(games_path)):
+                writer.writerow(row)
+                count += 1
+        os.replace(tmp_path, out_path)
+    except Exception:
+        logging.exception(f"Failed CSV export: {out_path}")
+        try:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        except Exception:
+            pass
+        return None
+    return count
+
+
+def export_parquet(games_path, out_path, row_group=50000):
+    """Columnar export for pandas and friends; desktop only.
+
+    Needs pyarrow, which the Android build does not package, so on a
+    phone this returns None and only the CSV is written. Rows are
+    buffered one row group at a time, so memory does not grow with the
+    size of the history.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        logging.warning("pyarrow not installed, columnar export unavailable")
+        return None
+
+    schema = pa.schema([
+        ("date", pa.string()),
+        ("game_id", pa.string()),
+        ("player", pa.string()),
+        ("score", pa.int64()),
+        ("winner", pa.string()),
+        ("rounds", pa.int32()),])
+    count = 0
+    tmp_path = f"{out_path}.tmp"
+    try:
+        with pq.ParquetWriter(tmp_path, schema) as writer:
+            columns = [[] for _ in ROW_FIELDS]
+            for row in iter_rows(iter_games(games_path)):
+                for col, value in zip(columns, row):
+                    col.append(value)
+                if len(columns[0]) >= row_group:
+                    writer.write_table(pa.Table.from_arrays(columns, schema=schema))
+                    count += len(columns[0])
+                    columns = [[] for _ in ROW_FIELDS]
+            if columns[0]:
+                writer.write_table(pa.Table.from_arrays(columns, schema=schema))
+                count += len(columns[0])
+        os.replace(tmp_path, out_path)
+    except Exception:
+        logging.exception(f"Failed columnar export: {out_path}")
+        try:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        except Exception:
+            pass
+        return None
+    return count
@@ -0,0 +1,1148 @@
+import bisect
+import copy
+import json
+import logging
+import mmap
+import os
+import shutil
+import threading
+import zlib
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from store import atomic_write_json, safe_load_json
+
+
+# --------------------------------------------------
+# Game history
+# --------------------------------------------------
+#
+# games.dom is a header line followed by one checksummed record per line:
+#
+#   #domino-history 2
+#   1a2b3c4d {"op":"put","game":{...}}
+#   5e6f7a8b {"op":"del","id":"2026-01-05T19:02:11"}
+#   9c0d1e2f {"op":"commit","n":2}
+#
+# Each line carries the CRC-32 of its JSON payload, and every write is a
+# batch closed by a commit record. A damaged line costs only that record,
+# a torn batch at the tail is dropped whole, and everything else is still
+# read. Older files holding a single JSON list are read and migrated on
+# the first write.
+
+MAGIC = b"#domino-history 2"
+
+
+def game_id(game):
+    # The ISO date a game was started at doubles as its ID
+    return game.get("date")
+
+
+def encode_record(record):
+    payload = json.dumps(record, separators=(",", ":")).encode("utf-8")
+    return b"%08x %s\n" % (zlib.crc32(payload), payload)
+
+
+def decode_record(line):
+    """Return the record on one line, or None if it fails its checksum."""
+    line = line.rstrip(b"\r\n")
+    if len(line) < 10 or line[8:9] != b" ":
+        return None
+    try:
+        crc = int(line[:8], 16)
+    except ValueError:
+        return None
+    payload = line[9:]
+    if zlib.crc32(payload) != crc:
+        return None
+    try:
+        record = json.loads(payload)
+    except ValueError:
+        return None
+    return record if isinstance(record, dict) else None
+
+
+def is_record_file(path):
+    try:
+        with open(path, "rb") as f:
+            return f.readline().rstrip(b"\r\n") == MAGIC
+    except OSError:
+        return False
+
+
+def scan_records(path, start=None):
+    """Yield (offset, length, record) per line; record is None when damaged.
+
+    Starts after the header, or at byte ``start`` to read only a tail.
+    """
+    with open(path, "rb") as f:
+        if start is None:
+            offset = len(f.readline())
+        else:
+            f.seek(start)
+            offset = start
+        for raw in f:
+            if raw.strip():
+                yield offset, len(raw), decode_record(raw)
+            offset += len(raw)
+
+
+def replay_records(records):
+    """Fold (key, record) pairs into committed puts and deletes.
+
+    Yields ("put", key, game) or ("del", key, id) for records whose batch
+    was committed; a batch with no commit record is ignored, even when a
+    later batch's commit follows it.
+    """
+    pending = []
+    for key, record in records:
+        if record is None:
+            continue
+        op = record.get("op")
+        if op == "commit":
+            n = record.get("n")
+            if isinstance(n, int) and 0 <= n < len(pending):
+                pending = pending[len(pending) - n:]
+            for k, r in pending:
+                if r.get("op") == "put" and isinstance(r.get("game"), dict):
+                    yield "put", k, r["game"]
+                elif r.get("op") == "del":
+                    yield "del", k, r.get("id")
+            pending = []
+        elif op in ("put", "del"):
+            pending.append((key, record))
+
+
+def _skipped(damage, text):
+    if damage is not None:
+        damage["regions"] += 1
+        damage["bytes"] += len(text.encode("utf-8", "replace"))
+
+
+def _iter_legacy(path, chunk_size, salvage=False, damage=None):
+    decoder = json.JSONDecoder()
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        buf = ""
+        started = False
+        eof = False
+        while not eof:
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buf += chunk
+            pos = 0
+            while True:
+                while pos < len(buf) and buf[pos] in " \t\r\n,":
+                    pos += 1
+                if pos >= len(buf):
+                    break
+                if not started:
+                    if buf[pos] != "[":
+                        if not salvage:
+                            raise ValueError(f"Game history is not a list: {path}")
+                    else:
+                        pos += 1
+                    started = True
+                    continue
+                if buf[pos] == "]":
+                    if not salvage:
+                        return
+                    pos += 1
+                    continue
+                try:
+                    game, end = decoder.raw_decode(buf, pos)
+                except ValueError:
+                    if not salvage:
+                        if eof:
+                            raise
+                        break  # game spans the chunk boundary
+                    if not eof and len(buf) - pos < chunk_size:
+                        break
+                    # Damaged region: resync on the next object start
+                    nxt = buf.find("{", pos + 1)
+                    if nxt < 0:
+                        _skipped(damage, buf[pos:])
+                        pos = len(buf)
+                        break
+                    _skipped(damage, buf[pos:nxt])
+                    pos = nxt
+                    continue
+                if isinstance(game, dict) and game_id(game) and isinstance(game.get("totals"), dict):
+                    pos = end
+                    yield game
+                else:
+                    _skipped(damage, buf[pos:end])
+                    pos = end
+            buf = buf[pos:]
+
+
+def iter_games(path, chunk_size=64 * 1024, salvage=False, damage=None):
+    """Yield the live games in a games.dom file one at a time.
+
+    Memory stays bounded by the largest game plus, for the record format,
+    one offset per game ID. With ``salvage`` a damaged legacy list is
+    resynchronised past bad regions instead of raising. Pass a ``damage``
+    dict with ``regions`` and ``bytes`` counters to have everything
+    skipped (damaged records, unreadable regions, non-game objects)
+    added to it.
+    """
+    if not path or not os.path.exists(path):
+        return
+    if not is_record_file(path):
+        yield from _iter_legacy(path, chunk_size, salvage, damage)
+        return
+    # First pass: where each live game's latest committed put lives
+    live = {}
+    for op, offset, value in replay_records(
+            (offset, record) for offset, _, record in scan_records(path)):
+        if op == "put":
+            live[game_id(value)] = offset
+        else:
+            live.pop(value, None)
+    wanted = set(live.values())
+    for offset, length, record in scan_records(path):
+        if record is None:
+            if damage is not None:
+                damage["regions"] += 1
+                damage["bytes"] += length
+        elif offset in wanted:
+            yield record["game"]
+
+
+# --------------------------------------------------
+# Offset index and mapped reads
+# --------------------------------------------------
+
+INDEX_VERSION = 3
+
+
+def _summary(game):
+    return {
+        "totals": {str(k): v for k, v in (game.get("totals") or {}).items()},
+        "finished": bool(game.get("finished")),}
+
+
+class HistoryIndex:
+    """Where each live game's record sits in games.dom, plus its totals.
+
+    Saved as a ``.idx`` sidecar keyed by the file's inode, mtime and the
+    number of bytes it covers. After appends only the new tail is read to
+    catch up; a file rewritten or overwritten in place is indexed from
+    scratch. Totals and the finished
+    flag are kept with each offset, so counts, ratings and per-player
+    summaries never touch the history file itself.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.idx_path = f"{path}.idx"
+        self.entries = {}
+        self.ino = None
+        self.mtime = None
+        self.size = 0
+        self.lines = 0
+        self.damaged = 0
+        self.dirty = False
+        self.loaded = False
+
+    def _stat(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return st.st_ino, st.st_size, st.st_mtime_ns
+
+    def reset(self, ino=None):
+        self.entries = {}
+        self.ino = ino
+        self.mtime = None
+        self.size = 0
+        self.lines = 0
+        self.damaged = 0
+
+    def discard(self):
+        """Forget everything, on disk too, so the next sync reindexes."""
+        self.reset()
+        self.loaded = True
+        self.dirty = False
+        try:
+            if os.path.exists(self.idx_path):
+                os.remove(self.idx_path)
+        except OSError:
+            logging.exception(f"Failed to remove history index: {self.idx_path}")
+
+    def load(self):
+        self.loaded = True
+        data = safe_load_json(self.idx_path, {})
+        if data.get("version") != INDEX_VERSION:
+            return
+        self.entries = {gid: tuple(e) for gid, e in data.get("games", {}).items()}
+        self.ino = data.get("ino")
+        self.mtime = data.get("mtime")
+        self.size = data.get("size", 0)
+        self.lines = data.get("lines", 0)
+        self.damaged = data.get("damaged", 0)
+
+    def save(self):
+        data = {
+            "version": INDEX_VERSION,
+            "ino": self.ino,
+            "mtime": self.mtime,
+            "size": self.size,
+            "lines": self.lines,
+            "damaged": self.damaged,
+            "games": self.entries,}
+        if atomic_write_json(self.idx_path, data):
+            self.dirty = False
+
+    def sync(self):
+        """Bring the index up to date with the file; False if it cannot be."""
+        if not self.loaded:
+            self.load()
+        stat = self._stat()
+        if stat is None:
+            self.reset()
+            return False
+        ino, size, mtime = stat
+        if mtime == self.mtime and ino == self.ino and size == self.size:
+            return True
+        # Growth is only an append if what was indexed is still there,
+        # ending on the same commit; a file copied over this one in place
+        # keeps its inode and may well be larger
+        appended = ino == self.ino and (
+            size > self.size and self._ends_on_commit() or
+            size == self.size and mtime == self.mtime)
+        if not appended:
+            if not is_record_file(self.path):
+                self.reset()
+                return False
+            self.reset(ino)
+        if size > self.size:
+            caught_up = self._scan(self.size or None)
+            # A long catch-up is worth persisting; short tails are cheap to redo
+            if caught_up > 64 * 1024:
+                self.save()
+        if self.mtime != mtime:
+            self.mtime = mtime
+            self.dirty = True
+        return True
+
+    def _ends_on_commit(self):
+        # The line just before ``size`` must be the commit (or the header)
+        # this index was built up to
+        if not self.size:
+            return False
+        try:
+            with open(self.path, "rb") as f:
+                f.seek(max(0, self.size - 4096))
+                head = f.read(self.size - f.tell())
+        except OSError:
+            return False
+        if not head.endswith(b"\n"):
+            return False
+        line = head[head.rfind(b"\n", 0, len(head) - 1) + 1:]
+        if line.rstrip(b"\r\n") == MAGIC:
+            return self.size == len(line)
+        record = decode_record(line)
+        return record is not None and record.get("op") == "commit"
+
+    def _scan(self, start):
+        before = self.size
+        pending = []
+        # Lines past the last commit are a torn write the next append drops,
+        # so they only count once a commit follows them
+        lines = damaged = 0
+        for offset, length, record in scan_records(self.path, start):
+            lines += 1
+            if record is None:
+                damaged += 1
+                continue
+            op = record.get("op")
+            if op == "commit":
+                n = record.get("n")
+                if isinstance(n, int) and 0 <= n < len(pending):
+                    pending = pending[len(pending) - n:]
+                for off, ln, r in pending:
+                    self._apply(r, off, ln)
+                pending = []
+                self.size = offset + length
+                self.lines += lines
+                self.damaged += damaged
+                lines = damaged = 0
+            elif op in ("put", "del"):
+                pending.append((offset, length, record))
+        if not self.size:
+            # Header only so far
+            with open(self.path, "rb") as f:
+                self.size = len(f.readline())
+        self.dirty = True
+        return self.size - before
+
+    def _apply(self, record, offset, length):
+        if record.get("op") == "del":
+            self.entries.pop(record.get("id"), None)
+            return
+        game = record.get("game")
+        if isinstance(game, dict) and game_id(game):
+            self.entries.pop(game_id(game), None)
+            self.entries[game_id(game)] = (offset, length, _summary(game))
+
+    def appended(self, ino, mtime, start, records, lines):
+        """Account for a batch this process just appended at byte ``start``."""
+        if ino != self.ino or start != self.size:
+            return  # behind already; the next sync reads the tail
+        self.mtime = mtime
+        offset = start
+        for record, line in zip(records, lines):
+            self._apply(record, offset, len(line))
+            offset += len(line)
+        self.size = offset
+        self.lines += len(records)
+        self.dirty = True
+
+    def rewritten(self, ino, mtime, size, entries, lines):
+        self.entries = entries
+        self.ino = ino
+        self.mtime = mtime
+        self.size = size
+        self.lines = lines
+        self.damaged = 0
+        self.loaded = True
+        self.save()
+
+
+class MappedHistory:
+    """Read-only, memory-mapped access to a record-format games.dom.
+
+    Only the byte ranges of the games asked for are parsed, so the OS
+    pages in just those parts of the file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.index = HistoryIndex(path)
+        self.map = None
+        self.map_key = None
+        # Offsets of indexed records that no longer pass their checksum
+        self.unreadable = set()
+
+    def _view(self):
+        if not self.index.sync():
+            self.close()
+            return None
+        key = (self.index.ino, self.index.size)
+        if self.map is None or self.map_key != key:
+            self.close()
+            with open(self.path, "rb") as f:
+                self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self.map_key = key
+        return self.map
+
+    def close(self):
+        if self.map is not None:
+            self.map.close()
+        self.map = None
+        self.map_key = None
+
+    def _read(self, view, entry):
+        offset, length = entry[0], entry[1]
+        record = decode_record(view[offset:offset + length])
+        if record is None:
+            self.unreadable.add(offset)
+            return None
+        return record.get("game")
+
+    def count(self):
+        return len(self.index.entries) if self.index.sync() else 0
+
+    def ids(self):
+        return list(self.index.entries) if self.index.sync() else []
+
+    def summaries(self):
+        if not self.index.sync():
+            return
+        for gid, entry in self.index.entries.items():
+            yield dict(entry[2], date=gid)
+
+    def get(self, gid):
+        view = self._view()
+        entry = self.index.entries.get(gid) if view is not None else None
+        return self._read(view, entry) if entry else None
+
+    def latest(self, n):
+        """The ``n`` newest games by date, newest first."""
+        view = self._view()
+        if view is None:
+            return []
+        gids = sorted(self.index.entries, reverse=True)[:n]
+        return [g for g in (self._read(view, self.index.entries[gid]) for gid in gids) if g]
+
+    def games(self):
+        """Every live game, in file order so pages are read front to back."""
+        view = self._view()
+        if view is None:
+            return
+        for entry in sorted(self.index.entries.values()):
+            game = self._read(view, entry)
+            if game:
+                yield game
+
+
+# --------------------------------------------------
+# History store
+# --------------------------------------------------
+
+class HistoryStore:
+    """In-memory view of games.dom with a single write path.
+
+    Every change goes through ``apply`` so listeners (sync, indexes) see
+    the same stream of upserts and deletes that hits the disk. Writes
+    append one committed batch; the file is rewritten only to migrate,
+    compact or repair it.
+
+    Until something needs the whole list, reads go through a mapped,
+    indexed view of the file and the history is never fully parsed.
+    """
+
+    def __init__(self, path, compact_ratio=4):
+        self.path = path
+        self.games = None
+        self.corrupt = False
+        self.legacy = False
+        self.lines = 0
+        # Byte offset just past the last commit, once known
+        self.end = None
+        # Damaged ranges found by the last ``scan``
+        self.damage = []
+        self.compact_ratio = compact_ratio
+        self.mapped = MappedHistory(path) if path else None
+        self.listeners = []
+        self.reload_listeners = []
+        self.lock = threading.RLock()
+
+    def subscribe(self, listener, on_reload=None):
+        self.listeners.append(listener)
+        if on_reload is not None:
+            self.reload_listeners.append(on_reload)
+
+    def exists(self):
+        return bool(self.path) and os.path.exists(self.path)
+
+    def load(self):
+        with self.lock:
+            if self.games is not None:
+                return self.games
+            self.games = {}
+            self.corrupt = False
+            self.legacy = False
+            self.lines = 0
+            self.end = None
+            if not self.exists() or os.path.getsize(self.path) == 0:
+                return self.games
+            if is_record_file(self.path):
+                self._load_records()
+            else:
+                self._load_legacy()
+            return self.games
+
+    def _load_records(self):
+        records = []
+        ends = []
+        for offset, length, record in scan_records(self.path):
+            records.append((None, record))
+            ends.append(offset + length)
+        for op, _, value in replay_records(records):
+            if op == "put":
+                gid = game_id(value)
+                self.games.pop(gid, None)
+                self.games[gid] = value
+            else:
+                self.games.pop(value, None)
+        torn = 0
+        for _, record in reversed(records):
+            if record is not None and record.get("op") == "commit":
+                break
+            torn += 1
+        committed = len(records) - torn
+        if committed:
+            self.end = ends[committed - 1]
+        else:
+            with open(self.path, "rb") as f:
+                self.end = len(f.readline())
+        self.lines = committed
+        bad = sum(1 for _, record in records[:committed] if record is None)
+        if bad:
+            logging.error(f"Game history has {bad} damaged records; skipped them")
+            self.corrupt = True
+        if torn:
+            logging.warning(f"Ignoring {torn} records from an unfinished write")
+
+    def _load_legacy(self):
+        self.legacy = True
+        try:
+            for g in _iter_legacy(self.path, 64 * 1024):
+                self.games[game_id(g)] = g
+            return
+        except Exception:
+            logging.exception(f"Failed to load game history: {self.path}")
+        self.corrupt = True
+        self.games = {}
+        for g in _iter_legacy(self.path, 64 * 1024, salvage=True):
+            self.games[game_id(g)] = g
+        logging.warning(f"Salvaged {len(self.games)} games from damaged history")
+
+    def reload(self):
+        with self.lock:
+            self.games = None
+            self.damage = []
+            if self.mapped:
+                self.mapped.close()
+                self.mapped.unreadable.clear()
+                # Imports copy files over games.dom, in place or not; only
+                # a full reindex can be trusted afterwards
+                self.mapped.index.discard()
+            games = self.load()
+        # Derived indexes rebuild lazily from the new contents
+        for listener in self.reload_listeners:
+            listener()
+        return games
+
+    def release(self):
+        """Drop the parsed games; later reads go back to the mapped file."""
+        with self.lock:
+            if self.games is not None and not self.legacy and not self.corrupt:
+                self.games = None
+
+    # ---------- reads ----------
+
+    def _mapped(self):
+        # The mapped view serves reads until the full list is loaded;
+        # legacy files are always read whole
+        if self.games is not None or not self.mapped or not self.mapped.index.sync():
+            return None
+        # The index only knows what was damaged when it read the records;
+        # later damage shows up in reads and in ``scan``
+        self.corrupt = bool(self.mapped.index.damaged or self.mapped.unreadable or self.damage)
+        return self.mapped
+
+    def all(self):
+        return list(self.load().values())
+
+    def get(self, gid):
+        with self.lock:
+            mapped = self._mapped()
+            if mapped:
+                game = mapped.get(gid)
+                self.corrupt = self.corrupt or bool(mapped.unreadable)
+                return game
+            return self.load().get(gid)
+
+    def count(self):
+        with self.lock:
+            mapped = self._mapped()
+            return mapped.count() if mapped else len(self.load())
+
+    def ids(self):
+        with self.lock:
+            mapped = self._mapped()
+            return mapped.ids() if mapped else list(self.load())
+
+    def latest(self, n):
+        with self.lock:
+            mapped = self._mapped()
+            if mapped:
+                games = mapped.latest(n)
+                self.corrupt = self.corrupt or bool(mapped.unreadable)
+                return games
+            games = self.load()
+            return [games[gid] for gid in sorted(games, reverse=True)[:n]]
+
+    def summaries(self):
+        """Lightweight ``{"date", "totals", "finished"}`` dicts for every game."""
+        with self.lock:
+            mapped = self._mapped()
+            if mapped:
+                return list(mapped.summaries())
+            return list(self.load().values())
+
+    def __contains__(self, gid):
+        with self.lock:
+            mapped = self._mapped()
+            if mapped:
+                return gid in mapped.index.entries
+            return gid in self.load()
+
+    # ---------- writes ----------
+
+    def save(self, game):
+        return self.apply([game], [])
+
+    def delete(self, gids):
+        return self.apply([], gids)
+
+    @contextmanager
+    def transaction(self):
+        """Stage edits to many games and write them as one committed batch.
+
+        An exception inside the block discards everything staged, and a
+        failed write leaves both the file and memory as they were; check
+        ``committed`` on the transaction afterwards.
+        """
+        with self.lock:
+            txn = Transaction(self)
+            yield txn
+            txn.commit()
+
+    def apply(self, upserts, deletes, replaces=None):
+        """Write upserted games and deleted IDs as one committed batch.
+
+        ``replaces`` maps a new game ID to the old one it supersedes, for
+        edits that change a game's date. Returns False, leaving memory
+        untouched, if the batch could not be written.
+        """
+        with self.lock:
+            if self.games is None and self._mapped() is None:
+                self.load()
+            removed = [gid for gid in deletes if gid in self]
+            for new, old in (replaces or {}).items():
+                if old and old != new and old not in removed and old in self:
+                    removed.append(old)
+            records = [{"op": "del", "id": gid} for gid in removed]
+            records += [{"op": "put", "id": game_id(g), "game": g} for g in upserts]
+            records.append({"op": "commit", "n": len(records)})
+
+            if self.legacy or not self.exists():
+                ok = self._rewrite(self._applied(self.load(), upserts, removed).values())
+            else:
+                ok = self._append(records)
+            if not ok:
+                return False
+            if self.games is not None:
+                for gid in removed:
+                    self.games.pop(gid, None)
+                for g in upserts:
+                    self.games.pop(game_id(g), None)
+                    self.games[game_id(g)] = g
+            self._maybe_compact()
+        for listener in self.listeners:
+            try:
+                listener(upserts, removed)
+            except Exception:
+                logging.exception("History listener failed")
+        return True
+
+    def _maybe_compact(self):
+        if self.games is not None:
+            lines, live = self.lines, len(self.games)
+        elif self.mapped and self.mapped.index.sync():
+            lines, live = self.mapped.index.lines, len(self.mapped.index.entries)
+        else:
+            return
+        if lines > self.compact_ratio * max(live, 16):
+            games = self.games.values() if self.games is not None else self.mapped.games()
+            self._rewrite(games)
+
+    def _applied(self, games, upserts, removed):
+        merged = {k: v for k, v in games.items() if k not in removed}
+        for g in upserts:
+            merged.pop(game_id(g), None)
+            merged[game_id(g)] = g
+        return merged
+
+    def _committed_end(self):
+        if self.mapped and self.mapped.index.sync():
+            return self.mapped.index.size
+        return self.end
+
+    def _append(self, records):
+        lines = [encode_record(r) for r in records]
+        end = self._committed_end()
+        try:
+            with open(self.path, "r+b") as f:
+                start = f.seek(0, os.SEEK_END)
+                if end is not None and start > end:
+                    # Left by a write that never committed; appending after it
+                    # would let this batch's commit replay those records too
+                    logging.warning(
+                        f"Dropping {start - end} bytes of an unfinished write from {self.path}")
+                    f.truncate(end)
+                    start = f.seek(end)
+                try:
+                    f.write(b"".join(lines))
+                    f.flush()
+                    os.fsync(f.fileno())
+                except Exception:
+                    f.truncate(start)
+                    raise
+                st = os.fstat(f.fileno())
+        except Exception:
+            logging.exception(f"Failed to append to game history: {self.path}")
+            return False
+        self.lines += len(records)
+        self.end = start + sum(len(line) for line in lines)
+        if self.mapped:
+            self.mapped.index.appended(st.st_ino, st.st_mtime_ns, start, records, lines)
+        return True
+
+    def _rewrite(self, games):
+        if self.corrupt and self.exists():
+            # Keep the damaged original before replacing it with what we salvaged
+            self.backup()
+        tmp_path = f"{self.path}.tmp"
+        entries = {}
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(MAGIC + b"\n")
+                offset = len(MAGIC) + 1
+                for g in games:
+                    gid = game_id(g)
+                    if gid in entries:
+                        continue
+                    line = encode_record({"op": "put", "id": gid, "game": g})
+                    f.write(line)
+                    entries[gid] = (offset, len(line), _summary(g))
+                    offset += len(line)
+                f.write(encode_record({"op": "commit", "n": len(entries)}))
+                f.flush()
+                os.fsync(f.fileno())
+                size = f.tell()
+            if self.mapped:
+                # An open map would pin the old file (and block the replace on Windows)
+                self.mapped.close()
+            os.replace(tmp_path, self.path)
+        except Exception:
+            logging.exception(f"Failed to rewrite game history: {self.path}")
+            try:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+            except Exception:
+                pass
+            return False
+        self.lines = len(entries) + 1
+        self.end = size
+        self.legacy = False
+        self.corrupt = False
+        self.damage = []
+        if self.mapped:
+            self.mapped.unreadable.clear()
+            st = os.stat(self.path)
+            self.mapped.index.rewritten(st.st_ino, st.st_mtime_ns, size, entries, self.lines)
+        return True
+
+    def backup(self):
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        dst = f"{self.path}.damaged-{stamp}"
+        try:
+            shutil.copyfile(self.path, dst)
+            logging.warning(f"Saved damaged game history to {dst}")
+        except Exception:
+            logging.exception("Failed to back up damaged game history")
+        return dst
+
+    # ---------- integrity ----------
+
+    def scan(self):
+        """Stream the file and return damaged byte ranges as (offset, length)."""
+        if not self.exists() or not is_record_file(self.path):
+            if self.exists():
+                try:
+                    for _ in _iter_legacy(self.path, 64 * 1024):
+                        pass
+                except Exception:
+                    return [(0, os.path.getsize(self.path))]
+            return []
+        bad = []
+        pending = []
+        for offset, length, record in scan_records(self.path):
+            if record is not None:
+                if record.get("op") == "commit":
+                    bad += pending
+                    pending = []
+                continue
+            # Past the last commit this is a torn write, not damage
+            if pending and pending[-1][0] + pending[-1][1] == offset:
+                pending[-1] = (pending[-1][0], pending[-1][1] + length)
+            else:
+                pending.append((offset, length))
+        with self.lock:
+            self.damage = bad
+            if bad:
+                self.corrupt = True
+        return bad
+
+    def recover(self):
+        """Rewrite the file from every intact game, keeping the damaged copy."""
+        with self.lock:
+            self.games = None
+            games = self.load()
+            self.corrupt = True
+            ok = self._rewrite(games.values())
+        for listener in self.reload_listeners:
+            listener()
+        return len(games) if ok else None
+
+
+# --------------------------------------------------
+# Batch edits
+# --------------------------------------------------
+
+class Transaction:
+    """Edits staged against a HistoryStore by ``HistoryStore.transaction``.
+
+    ``get`` hands out copies, so a game can be changed freely and only
+    ``put`` back when the edit is wanted.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.upserts = {}
+        self.deletes = []
+        self.replaces = {}
+        self.committed = False
+
+    def get(self, gid):
+        if gid in self.upserts:
+            return self.upserts[gid]
+        if gid in self.deletes:
+            return None
+        game = self.store.get(gid)
+        return copy.deepcopy(game) if game is not None else None
+
+    def put(self, game, replaces=None):
+        gid = game_id(game)
+        if gid in self.deletes:
+            self.deletes.remove(gid)
+        self.upserts[gid] = game
+        if replaces and replaces != gid:
+            self.replaces[gid] = replaces
+
+    def delete(self, gid):
+        self.upserts.pop(gid, None)
+        if gid not in self.deletes:
+            self.deletes.append(gid)
+
+    def commit(self):
+        if self.upserts or self.deletes:
+            self.committed = self.store.apply(list(self.upserts.values()), self.deletes, self.replaces)
+        else:
+            self.committed = True
+        return self.committed
+
+
+def _rewinner(game):
+    totals = game.get("totals") or {}
+    if game.get("finished") and totals:
+        game["winner"] = max(totals.items(), key=lambda x: x[1])[0]
+
+
+def rename_in_game(game, old, new):
+    """Rename a player in one game dict, merging totals if both played."""
+    totals = game.get("totals") or {}
+    if old not in totals or not new or old == new:
+        return False
+    renamed = {}
+    for name, total in totals.items():
+        key = new if name == old else name
+        renamed[key] = renamed.get(key, 0) + total
+    game["totals"] = renamed
+    if "rounds" in game:
+        game["rounds"] = [[new if n == old else n, p] for n, p in game["rounds"] or ()]
+    _rewinner(game)
+    return True
+
+
+def adjust_in_game(game, name, delta):
+    """Add ``delta`` to a player's total, as an extra round when rounds are kept."""
+    totals = game.get("totals") or {}
+    if name not in totals or not delta:
+        return False
+    totals[name] += delta
+    if game.get("rounds"):
+        game["rounds"].append([name, delta])
+    _rewinner(game)
+    return True
+
+
+def retotal_rounds(rounds, totals, renames=None):
+    """Rounds brought in line with edited ``totals``.
+
+    Renamed players (``renames`` maps old to new) keep their rounds,
+    rounds of players no longer in ``totals`` are dropped, and any other
+    difference becomes one extra round per player, as ``adjust_in_game``
+    records it.
+    """
+    renames = renames or {}
+    kept = []
+    scored = {}
+    for name, pts in rounds:
+        name = renames.get(name, name)
+        if name in totals:
+            kept.append((name, pts))
+            scored[name] = scored.get(name, 0) + pts
+    for name, total in totals.items():
+        if total != scored.get(name, 0):
+            kept.append((name, total - scored.get(name, 0)))
+    return kept
+
+
+class PlayerGames:
+    """Inverted index from player name to the IDs of the games they played.
+
+    Each player's IDs are kept sorted, which is also chronological, so
+    "all games for Bob", their count and their most recent game cost
+    time in proportion to Bob's games, not the whole history. Updated
+    from every history write.
+    """
+
+    def __init__(self):
+        self.by_player = {}
+        self.seen = {}
+        self.built = False
+
+    def attach(self, history):
+        history.subscribe(self.on_history_change, self.invalidate)
+
+    def invalidate(self):
+        self.by_player.clear()
+        self.seen.clear()
+        self.built = False
+
+    def ensure_built(self, history):
+        if not self.built:
+            for game in history.summaries():
+                gid = game_id(game)
+                names = list((game.get("totals") or {}).keys())
+                self.seen[gid] = names
+                for name in names:
+                    self.by_player.setdefault(name, []).append(gid)
+            for gids in self.by_player.values():
+                gids.sort()
+            self.built = True
+        return self
+
+    def _add(self, game):
+        gid = game_id(game)
+        names = list((game.get("totals") or {}).keys())
+        self.seen[gid] = names
+        for name in names:
+            bisect.insort(self.by_player.setdefault(name, []), gid)
+
+    def _remove(self, gid):
+        for name in self.seen.pop(gid, ()):
+            gids = self.by_player.get(name)
+            if not gids:
+                continue
+            i = bisect.bisect_left(gids, gid)
+            if i < len(gids) and gids[i] == gid:
+                del gids[i]
+            if not gids:
+                del self.by_player[name]
+
+    def on_history_change(self, upserts, deletes):
+        if not self.built:
+            return
+        for gid in deletes:
+            self._remove(gid)
+        for game in upserts:
+            self._remove(game_id(game))
+            self._add(game)
+
+    def games_of(self, name):
+        """IDs of every game ``name`` played, newest first."""
+        return self.by_player.get(name, [])[::-1]
+
+    def count(self, name):
+        return len(self.by_player.get(name, ()))
+
+    def last(self, name):
+        gids = self.by_player.get(name)
+        return gids[-1] if gids else ""
+
+    def order(self, names):
+        # Most recently played first, then most played, then by name
+        names = sorted(names, key=str.lower)
+        return sorted(
+            names,
+            key=lambda n: (self.last(n), self.count(n)),
+            reverse=True,)
+
+
+class DateIndex:
+    """Game IDs kept sorted so date ranges are two bisects and a slice.
+
+    IDs are ISO timestamps, which sort chronologically as strings.
+    """
+
+    def __init__(self):
+        self.ids = []
+        self.built = False
+
+    def attach(self, history):
+        history.subscribe(self.on_history_change, self.invalidate)
+
+    def invalidate(self):
+        self.ids = []
+        self.built = False
+
+    def ensure_built(self, history):
+        if not self.built:
+            self.ids = sorted(gid for gid in history.ids() if gid)
+            self.built = True
+        return self
+
+    def on_history_change(self, upserts, deletes):
+        if not self.built:
+            return
+        for gid in deletes:
+            i = bisect.bisect_left(self.ids, gid)
+            if i < len(self.ids) and self.ids[i] == gid:
+                del self.ids[i]
+        for game in upserts:
+            gid = game_id(game)
+            i = bisect.bisect_left(self.ids, gid)
+            if i == len(self.ids) or self.ids[i] != gid:
+                self.ids.insert(i, gid)
+
+    def between(self, start=None, end=None):
+        """IDs with start <= date < end, newest first. Bounds are datetimes."""
+        lo = bisect.bisect_left(self.ids, start.isoformat()) if start else 0
+        hi = bisect.bisect_left(self.ids, end.isoformat()) if end else len(self.ids)
+        return self.ids[lo:hi][::-1]
+
+    def latest(self, n):
+        """The ``n`` newest IDs, newest first."""
+        return self.ids[-n:][::-1] if n > 0 else []
+
+    def __len__(self):
+        return len(self.ids)
+
+    def contains(self, gid, start=None, end=None):
+        return (start is None or gid >= start.isoformat()) and (end is None or gid < end.isoformat())
+
+
+def date_range(kind, now=None):
+    """(start, end) datetimes for a named period ending now; end is open."""
+    now = now or datetime.now()
+    today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    if kind == "week":
+        return today - timedelta(days=today.weekday()), None
+    if kind == "month":
+        return today.replace(day=1), None
+    if kind == "season":
+        # Calendar quarters
+        return today.replace(month=3 * ((today.month - 1) // 3) + 1, day=1), None
+    if kind == "year":
+        return today.replace(month=1, day=1), None
+    return None, None
+
+
+def parse_range(text):
+    """Parse "YYYY-MM-DD..YYYY-MM-DD" (either side optional, end inclusive)."""
+    if ".." not in text:
+        return None
+    left, right = (part.strip() for part in text.split("..", 1))
+    try:
+        start = datetime.fromisoformat(left) if left else None
+        end = datetime.fromisoformat(right) + timedelta(days=1) if right else None
+    except ValueError:
+        return None
+    return start, end
@@ -1,15 +1,25 @@
-import json
+import asyncio
 import logging
 import os
 import random
+import threading
 from datetime import datetime
-from android.permissions import request_permissions
 
+try:
+    from android.permissions import request_permissions
+except ImportError:
+    # Desktop runs and the headless benchmark have no android module
+    request_permissions = None
+
+from kivy.clock import Clock
 from kivy.core.text import LabelBase
-from kivy.metrics import dp
-from kivy.properties import ListProperty, NumericProperty
+from kivy.graphics import Color, Line
+from kivy.metrics import Metrics, dp
+from kivy.properties import BooleanProperty, ListProperty, NumericProperty, StringProperty
+from kivy.uix.recycleview.views import RecycleDataViewBehavior
 from kivy.utils import get_color_from_hex, platform
-from kivy.uix.screenmanager import ScreenManager
+from kivy.uix.screenmanager import NoTransition, ScreenManager
+from kivy.uix.widget import Widget
 
 from kivymd.app import MDApp
 from kivymd.uix.boxlayout import MDBoxLayout
@@ -20,6 +30,21 @@ from kivymd.uix.label import MDLabel
 from kivymd.uix.screen import MDScreen
 from kivymd.uix.textfield import MDTextField
 
+from assets import asset_source
+from charts import SeriesCache
+from diagnostics import FrameProfiler, memory_report
+from export import export_csv, export_parquet
+from history import (
+    DateIndex, HistoryStore, PlayerGames, adjust_in_game, date_range, parse_range,
+    rename_in_game, retotal_rounds,)
+from merkle import MerkleTree
+from models import MAX_POINTS, GameScore, Player
+from ratings import RatingEngine
+from search import GameIndex, PrefixIndex
+from store import PlayerStore, atomic_write_json, safe_load_json
+from sync import HOST_TIMEOUT, SYNC_PORT, SyncHost, SyncState, sync_with
+from tournament import Tournament
+
 
 # --------------------------------------------------
 # Paths & Logging (SAFE)
@@ -51,38 +76,6 @@ def setup_logger():
 def ids_ready(screen, *names):
     return all(name in screen.ids for name in names)
 
-def safe_load_json(path, default):
-    if not path or not os.path.exists(path):
-        return default
-    try:
-        if os.path.getsize(path) == 0:
-            return default
-    except Exception:
-        return default
-    try:
-        with open(path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        return data if isinstance(data, type(default)) else default
-    except Exception:
-        logging.exception(f"Failed to load JSON: {path}")
-        return default
-
-def atomic_write_json(path, data):
-    tmp_path = f"{path}.tmp"
-    try:
-        with open(tmp_path, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2)
-            f.flush()
-            os.fsync(f.fileno())
-        os.replace(tmp_path, path)  # atomic on Android/Linux
-    except Exception:
-        logging.exception(f"Failed atomic write: {path}")
-        try:
-            if os.path.exists(tmp_path):
-                os.remove(tmp_path)
-        except Exception:
-            pass
-
 def get_data_dir():
     if platform == "android":
         from android.storage import app_storage_path
@@ -112,12 +105,21 @@ def get_export_dir():
 DATA_DIR = None
 SAVE_FILE = None
 GAMES_FILE = None
+TOURNAMENT_FILE = None
+RESUME_FILE = None
 
 # --------------------------------------------------
 # Constants
 # --------------------------------------------------
 
-MAX_POINTS = 300
+SNAPSHOT_VERSION = 1
+SEARCH_LIMIT = 50
+HISTORY_PAGE = 200
+CHART_GAMES = 12
+CHART_COLORS = [
+    "#42A5F5", "#EF5350", "#66BB6A", "#FFCA28",
+    "#AB47BC", "#26C6DA", "#FF7043", "#8D6E63",
+]
 SELECTED_COLOR = get_color_from_hex("#4CAF50")
 DEFAULT_COLOR = get_color_from_hex("#1E88E5")
 
@@ -142,64 +144,96 @@ COLORS = [
 
 
 # --------------------------------------------------
-# Models
+# UI Helpers
 # --------------------------------------------------
 
-class Player:
-    def __init__(self, name, wins=0, losses=0):
-        self.name = name
-        self.wins = wins
-        self.losses = losses
+class MDSeparator(MDBoxLayout):
+    thickness = NumericProperty(dp(1))
+    color = ListProperty([1, 1, 1, 0.2])
 
-    def to_dict(self):
-        return self.__dict__
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.size_hint_y = None
+        self.height = self.thickness
+        self.md_bg_color = [1, 1, 1, 0.2]
 
-    @classmethod
-    def from_dict(cls, data):
-        return cls(**data)
 
+class LazyScreenManager(ScreenManager):
+    """Builds each screen the first time it is shown.
 
-class GameScore:
-    def __init__(self, players):
-        self.date = datetime.now().isoformat()
-        self.players = players
-        self.totals = {p.name: 0 for p in players}
-        self.rounds = []
-        self.finished = False
+    ``factories`` are ``(screen class, name)`` pairs. A relaunch then pays
+    only for the screen the user lands on.
+    """
 
-    def add_points(self, name, pts):
-        self.totals[name] += pts
-        self.rounds.append({"player": name, "points": pts})
-        self.finished = any(total >= MAX_POINTS for total in self.totals.values())
+    def __init__(self, factories, **kwargs):
+        super().__init__(**kwargs)
+        self.factories = {name: cls for cls, name in factories}
 
-    def winner(self):
-        if not self.totals:
-            return None
-        if not self.finished:
-            return None
-        return max(self.totals.items(), key=lambda x: x[1])[0]
-        
-    def to_dict(self):
-        return {
-            "date": self.date,
-            "totals": self.totals,
-            "winner": self.winner(),
-            "finished": self.finished,}
+    def ensure(self, name):
+        cls = self.factories.pop(name, None)
+        if cls is not None:
+            self.add_widget(cls(name=name))
 
+    def get_screen(self, name):
+        self.ensure(name)
+        return super().get_screen(name)
 
-# --------------------------------------------------
-# UI Helpers
-# --------------------------------------------------
+    def has_screen(self, name):
+        return name in self.factories or super().has_screen(name)
 
-class MDSeparator(MDBoxLayout):
-    thickness = NumericProperty(dp(1))
-    color = ListProperty([1, 1, 1, 0.2])
+
+class ScoreChart(Widget):
+    """Running totals of one or more games, one line per player.
+
+    Series come from the app's SeriesCache already downsampled to the
+    widget's pixel width, and redraws are coalesced to one per frame.
+    """
+    games = ListProperty([])
+    legend = StringProperty("")
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        self.size_hint_y = None
-        self.height = self.thickness
-        self.md_bg_color = [1, 1, 1, 0.2]
+        self._redraw = Clock.create_trigger(self.redraw)
+        self.bind(size=self._redraw, pos=self._redraw, games=self._redraw)
+
+    def show(self, games):
+        self.games = [g for g in games if g][:CHART_GAMES]
+
+    def redraw(self, *args):
+        self.canvas.clear()
+        if not self.games or self.width < 3 or self.height < 3:
+            self.legend = ""
+            return
+        cache = MDApp.get_running_app().chart_cache
+        sampled = [cache.sampled(g, self.width) for g in self.games]
+        lines = [points for s in sampled for points in s.values()]
+        if not lines:
+            # Games with no totals (possible from sync or an import) draw nothing
+            self.legend = ""
+            return
+        max_x = max(points[-1][0] for points in lines) or 1
+        min_y = min(0, min(y for points in lines for _, y in points))
+        max_y = max(MAX_POINTS, max(y for points in lines for _, y in points))
+        sx = self.width / max_x
+        sy = self.height / (max_y - min_y)
+        # Thick lines are tessellated; keep overlays on the cheap 1px path
+        width = dp(1) if len(self.games) == 1 else 1
+        colors = {}
+        with self.canvas:
+            Color(1, 1, 1, 0.15)
+            target = self.y + (MAX_POINTS - min_y) * sy
+            Line(points=[self.x, target, self.right, target])
+            for s in sampled:
+                for name, points in s.items():
+                    hex_color = colors.setdefault(name, CHART_COLORS[len(colors) % len(CHART_COLORS)])
+                    Color(*get_color_from_hex(hex_color))
+                    flat = []
+                    for x, y in points:
+                        flat.append(self.x + x * sx)
+                        flat.append(self.y + (y - min_y) * sy)
+                    Line(points=flat, width=width)
+        self.legend = "  ".join(
+            f"[color={hex_color}]{name}[/color]" for name, hex_color in colors.items())
 
 
 # --------------------------------------------------
@@ -220,6 +254,8 @@ class MenuScreen(MDScreen):
         self.ids.start_btn.disabled = not bool(app.players)
         self.ids.history_btn.disabled = not (
         GAMES_FILE is not None and os.path.exists(GAMES_FILE))
+        if ids_ready(self, "tournament_btn"):
+            self.ids.tournament_btn.disabled = app.tournament is None
         
 
 class OptionsScreen(MDScreen):
@@ -235,11 +271,91 @@ class OptionsScreen(MDScreen):
         app.save_players()
         self.manager.current = "menu"
 
+    def export_table(self):
+        out_dir = get_export_dir()
+        written = []
+        rows = export_csv(GAMES_FILE, os.path.join(out_dir, "games.csv"))
+        if rows is not None:
+            written.append(f"games.csv ({rows} rows)")
+        rows = export_parquet(GAMES_FILE, os.path.join(out_dir, "games.parquet"))
+        if rows is not None:
+            written.append(f"games.parquet ({rows} rows)")
+        self.show_dialog(
+            "Export Complete" if written else "Export Failed",
+            "\n".join(written) if written else "Nothing exported",)
+
     def import_saves(self):
         app = MDApp.get_running_app()
+        # The imported players.dom replaces the roster outright
+        app.player_store.reset()
         app.players = app.load_players()
+        app.index_players()
+        app.history.reload()
         self.manager.current = "menu"
 
+    def repair_history(self):
+        app = MDApp.get_running_app()
+        if not app.history.corrupt and not app.history_damage:
+            self.show_dialog("Repair History", "Game history is intact")
+            return
+        recovered = app.history.recover()
+        app.history_damage = []
+        if recovered is None:
+            self.show_dialog("Repair Failed", "Could not rewrite game history")
+            return
+        self.show_dialog(
+            "Repair Complete",
+            f"Recovered {recovered} games\nThe damaged file was kept as a backup",)
+
+    def rename_player(self):
+        if not ids_ready(self, "rename_player_from", "rename_player_to"):
+            return
+        old = self.ids.rename_player_from.text.strip()
+        new = self.ids.rename_player_to.text.strip()
+        if not old or not new or old == new:
+            return
+        app = MDApp.get_running_app()
+        merge = new in app.players
+        changed = app.rename_player(old, new)
+        if changed is None:
+            self.show_dialog("Rename Failed", f"Could not rename {old}")
+            return
+        self.ids.rename_player_from.text = ""
+        self.ids.rename_player_to.text = ""
+        verb = "Merged into" if merge else "Renamed to"
+        self.show_dialog("Rename Player", f"{verb} {new}\nUpdated {changed} games")
+
+    def host_sync(self):
+        app = MDApp.get_running_app()
+        code = app.start_sync_server(self.on_hosting_done)
+        self.show_dialog(
+            "Sync",
+            f"Waiting for one device on port {SYNC_PORT}\nPairing code: {code}\n"
+            f"Hosting stops after {HOST_TIMEOUT // 60} minutes",)
+
+    def stop_hosting(self):
+        MDApp.get_running_app().stop_sync_server()
+
+    def on_hosting_done(self, synced):
+        if synced:
+            self.show_dialog("Sync Complete", "The other device is up to date")
+
+    def sync_now(self):
+        if not ids_ready(self, "sync_host", "sync_code"):
+            return
+        host = self.ids.sync_host.text.strip()
+        code = self.ids.sync_code.text.strip()
+        if not host or not code:
+            return
+        MDApp.get_running_app().sync_with_peer(host, code, self.on_sync_done)
+
+    def on_sync_done(self, result):
+        if result is None:
+            self.show_dialog("Sync Failed", "Check the address and the pairing code on the other device")
+            return
+        received, sent = result
+        self.show_dialog("Sync Complete", f"Received {received} games\nSent {sent} games")
+
 
 class HistoryCheckbox(MDCheckbox):
     game_id = None
@@ -249,30 +365,70 @@ class HistoryScreen(MDScreen):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.selected = set()
+        self.period = None
 
     def on_enter(self):
+        self.selected.clear()
+        self.show_chart()
+        query = self.ids.history_search.text if ids_ready(self, "history_search") else ""
+        self.filter(query)
+
+    def filter(self, query=""):
         if not ids_ready(self, "history_list"):
             return
         
         box = self.ids.history_list
         box.clear_widgets()
-        self.selected.clear()
 
-        if not os.path.exists(GAMES_FILE):
+        app = MDApp.get_running_app()
+        if not app.history.exists():
             box.add_widget(MDLabel(text="No games yet"))
             return
 
-        try:
-            with open(GAMES_FILE) as f:
-                games = json.load(f)
-        except Exception:
-            box.add_widget(MDLabel(text="Corrupted game history"))
-            return
+        dates = app.date_index.ensure_built(app.history)
+        start, end = date_range(self.period)
+        explicit = parse_range(query)
+        if explicit:
+            start, end = explicit
+            query = ""
+        if query.strip() in app.players:
+            # A full player name lists all of their games, not a search page
+            played = app.player_games.ensure_built(app.history).games_of(query.strip())
+            gids = [gid for gid in played if dates.contains(gid, start, end)]
+        elif query.strip():
+            index = app.game_index.ensure_built(app.history)
+            # Matches can span several names; list them newest first
+            gids = sorted(
+                (gid for gid in index.search(query, SEARCH_LIMIT) if dates.contains(gid, start, end)),
+                reverse=True,)
+        elif start or end:
+            gids = dates.between(start, end)
+        else:
+            gids = None
+        # Only the newest page is read; search or a period reaches the rest.
+        # The date index is already sorted, so the page is a slice.
+        page = dates.latest(HISTORY_PAGE) if gids is None else gids
+        games = [g for g in (app.history.get(gid) for gid in page) if g]
+        if app.history.corrupt or app.history_damage:
+            # Whatever survived is still listed; Options > Repair History
+            # rewrites the file from it
+            box.add_widget(MDLabel(
+                text="Some game history was damaged. Showing the games that could be read.",
+                theme_text_color="Error",
+                size_hint_y=None,
+                height=dp(48),))
+        if gids is None and len(dates) > HISTORY_PAGE:
+            box.add_widget(MDLabel(
+                text=f"Showing the latest {HISTORY_PAGE} games. Search or pick a period for older ones.",
+                font_style="Caption",
+                size_hint_y=None,
+                height=dp(32),))
 
-        for g in reversed(games):
+        for g in games:
             row = MDBoxLayout(orientation="horizontal", size_hint_y=None, height=dp(56))
             cb = HistoryCheckbox(size_hint=(None, None), size=(dp(48), dp(48)))
             cb.game_id = g.get("date")
+            cb.active = cb.game_id in self.selected
             cb.bind(active=self.on_checkbox)
             row.add_widget(cb)
 
@@ -282,6 +438,11 @@ class HistoryScreen(MDScreen):
             row.add_widget(col)
             box.add_widget(row)
 
+    def set_period(self, period):
+        self.period = period
+        query = self.ids.history_search.text if ids_ready(self, "history_search") else ""
+        self.filter(query)
+
     def on_checkbox(self, checkbox, value):
         game_id = checkbox.game_id
         if not game_id:
@@ -291,19 +452,21 @@ class HistoryScreen(MDScreen):
             self.selected.add(game_id)
         else:
             self.selected.discard(game_id)
+        self.show_chart()
+
+    def show_chart(self):
+        if not ids_ready(self, "history_chart"):
+            return
+        app = MDApp.get_running_app()
+        gids = sorted(self.selected, reverse=True)[:CHART_GAMES]
+        self.ids.history_chart.show([app.history.get(gid) for gid in gids])
         
     def delete_selected(self):
         self.selected.discard(None)
         if not self.selected:
             return
 
-        games = safe_load_json(GAMES_FILE, [])
-
-        games = [g for g in games if g.get("date") not in self.selected]
-
-        with open(GAMES_FILE, "w") as f:
-            json.dump(games, f, indent=2)
-
+        MDApp.get_running_app().history.delete(list(self.selected))
         self.on_enter()
 
     def edit_selected(self):
@@ -313,19 +476,67 @@ class HistoryScreen(MDScreen):
 
         game_id = next(iter(self.selected))
 
-        games = safe_load_json(GAMES_FILE, []) 
+        app = MDApp.get_running_app()
+        g = app.history.get(game_id)
+        if g is None:
+            return
+        app.current_game = GameScore.from_dict(g)
+        app.editing_id = game_id
+        self.manager.current = "edit"
 
-        for g in games:
-            if g.get("date") == game_id:
-                app = MDApp.get_running_app()
-                game = GameScore([])
-                game.date = g["date"]
-                game.totals = g["totals"]
-                game.finished = g.get("finished", False)
-                game.players = [Player(n) for n in g["totals"].keys()]
-                app.current_game = game
-                self.manager.current = "edit"
+    def batch_edit_selected(self):
+        self.selected.discard(None)
+        if not self.selected:
+            return
+        MDApp.get_running_app().batch_ids = sorted(self.selected)
+        self.manager.current = "batch"
+
+
+class BatchEditScreen(MDScreen):
+    def on_pre_enter(self):
+        app = MDApp.get_running_app()
+        if not app.batch_ids:
+            self.manager.current = "history"
+            return
+        if not ids_ready(self, "batch_title", "rename_from", "rename_to", "adjust_player", "adjust_points"):
+            return
+        self.ids.batch_title.text = f"Edit {len(app.batch_ids)} games"
+        for name in ("rename_from", "rename_to", "adjust_player", "adjust_points"):
+            self.ids[name].text = ""
+
+    def show_dialog(self, title, text):
+        d = MDDialog(
+            title=title,
+            text=text,
+            buttons=[MDFlatButton(text="OK", on_release=lambda x: d.dismiss())])
+        d.open()
+
+    def apply(self):
+        app = MDApp.get_running_app()
+        rename = (self.ids.rename_from.text.strip(), self.ids.rename_to.text.strip())
+        if not all(rename):
+            rename = None
+        adjust = None
+        player = self.ids.adjust_player.text.strip()
+        if player:
+            try:
+                adjust = (player, int(self.ids.adjust_points.text.strip()))
+            except ValueError:
+                self.show_dialog("Batch Edit", "Score adjustment must be a whole number")
                 return
+        if not rename and not adjust:
+            return
+        changed = app.batch_edit(app.batch_ids, rename, adjust)
+        if changed is None:
+            self.show_dialog("Batch Edit Failed", "Nothing was changed")
+            return
+        app.batch_ids = []
+        self.manager.current = "history"
+        self.show_dialog("Batch Edit", f"Updated {changed} games")
+
+    def cancel(self):
+        MDApp.get_running_app().batch_ids = []
+        self.manager.current = "history"
 
 
 class EditGameScreen(MDScreen):
@@ -348,6 +559,8 @@ class EditGameScreen(MDScreen):
         self.ids.date_field.text = game.date
         for name, score in game.totals.items():
             self.add_row(name, score)
+        if ids_ready(self, "score_chart"):
+            self.ids.score_chart.show([game.to_dict()])
 
     def add_row(self, name="", score=0):
         row = MDBoxLayout(size_hint_y=None, height=dp(52), spacing=dp(10))
@@ -359,6 +572,8 @@ class EditGameScreen(MDScreen):
             input_filter="int",)
         row.name_field = name_field
         row.score_field = score_field
+        # Name the row was opened with, so a rename can carry the rounds
+        row.original = name
         row.add_widget(name_field)
         row.add_widget(score_field)
         self.ids.score_table.add_widget(row)
@@ -366,16 +581,17 @@ class EditGameScreen(MDScreen):
     def save_game(self):
         app = MDApp.get_running_app()
         game = app.current_game
-        if not game:
-            return
         if not game:
             return
         new_totals = {}
+        renames = {}
         for row in self.ids.score_table.children:
             name = row.name_field.text.strip()
             score = row.score_field.text.strip()
             if not name:
                 continue
+            if row.original and row.original != name:
+                renames[row.original] = name
             try:
                 new_totals[name] = int(score)
             except ValueError:
@@ -386,6 +602,8 @@ class EditGameScreen(MDScreen):
             game.date = datetime.fromisoformat(self.ids.date_field.text).isoformat()
         except ValueError:
             game.date = datetime.now().isoformat()
+        if game.rounds:
+            game.rounds = retotal_rounds(game.rounds, new_totals, renames)
         game.totals = new_totals
         game.players = [Player(n) for n in new_totals.keys()]
         app.save_edited_game(game)
@@ -401,43 +619,76 @@ class CreatePlayerScreen(MDScreen):
         if not name or name in app.players:
             return
         app.players[name] = Player(name)
-        app.save_players()
+        app.player_index.add(name, name)
+        app.save_player(app.players[name])
         self.ids.player_name.text = ""
         self.manager.current = "menu"
 
 
+class PlayerRow(RecycleDataViewBehavior, MDRaisedButton):
+    # Rows are recycled as the list scrolls; everything shown comes from
+    # the data dict, so selection lives on the screen, not the widget.
+    player = StringProperty("")
+    selected = BooleanProperty(False)
+
+    def refresh_view_attrs(self, rv, index, data):
+        super().refresh_view_attrs(rv, index, data)
+        self.md_bg_color = SELECTED_COLOR if self.selected else DEFAULT_COLOR
+
+    def on_release(self):
+        MDApp.get_running_app().root.get_screen("select").toggle(self.player)
+
+
 class PlayerSelectScreen(MDScreen):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.selected = set()
+        self.rows = {}
 
     def on_enter(self):
         self.selected.clear()
+        query = self.ids.player_search.text if ids_ready(self, "player_search") else ""
+        self.filter(query)
+
+    def filter(self, query=""):
         if not ids_ready(self, "player_list"):
             return
-        box = self.ids.player_list
-        box.clear_widgets()
-
-        for name in MDApp.get_running_app().players:
-            btn = MDRaisedButton(
-                text=name,
-                on_release=lambda x, n=name: self.toggle(n, x),)
-            box.add_widget(btn)
-
-    def toggle(self, name, button):
+        app = MDApp.get_running_app()
+        if query.strip():
+            names = app.player_index.search(query, SEARCH_LIMIT)
+        else:
+            names = app.players
+        names = app.player_games.ensure_built(app.history).order(names)
+        self.rows = {name: i for i, name in enumerate(names)}
+        self.ids.player_list.data = [
+            {"text": name, "player": name, "selected": name in self.selected}
+            for name in names]
+
+    def toggle(self, name):
         if name in self.selected:
             self.selected.remove(name)
-            button.md_bg_color = DEFAULT_COLOR
         else:
             self.selected.add(name)
-            button.md_bg_color = SELECTED_COLOR
+        i = self.rows.get(name)
+        if i is not None:
+            rv = self.ids.player_list
+            rv.data[i]["selected"] = name in self.selected
+            rv.refresh_from_data()
 
     def start(self):
         MDApp.get_running_app().start_game(list(self.selected))
 
+    def start_tournament(self, seats=2):
+        MDApp.get_running_app().start_tournament(list(self.selected), seats)
+
 
 class GameScreen(MDScreen):
     def on_enter(self):
+        if ids_ready(self, "tables_btn"):
+            app = MDApp.get_running_app()
+            in_table = app.current_table is not None
+            self.ids.tables_btn.disabled = not in_table
+            self.ids.tables_btn.opacity = 1 if in_table else 0
         self.refresh()
 
     def refresh(self):
@@ -468,8 +719,70 @@ class GameScreen(MDScreen):
             logging.warning("Attempted to score with no active game")
             return    
         app.current_game.add_points(name, pts)
+        app.save_current_table()
         self.refresh()
 
+
+class LeaderboardScreen(MDScreen):
+    def on_enter(self):
+        if not ids_ready(self, "leaderboard_list"):
+            return
+        app = MDApp.get_running_app()
+        box = self.ids.leaderboard_list
+        box.clear_widgets()
+        rows = app.ratings.ensure_built(app.history).leaderboard()
+        if not rows:
+            box.add_widget(MDLabel(text="No rated games yet"))
+            return
+        for rank, (name, rating, played) in enumerate(rows, start=1):
+            box.add_widget(
+                MDLabel(
+                    text=f"{rank}. {name} — {rating:.0f} ({played} games)",
+                    size_hint_y=None,
+                    height=dp(36),))
+
+
+class TournamentScreen(MDScreen):
+    def on_enter(self):
+        self.refresh()
+
+    def refresh(self):
+        app = MDApp.get_running_app()
+        tournament = app.tournament
+        if not tournament:
+            self.manager.current = "menu"
+            return
+        if not ids_ready(self, "table_list", "round_label", "next_round_btn"):
+            return
+        self.ids.round_label.text = f"Round {tournament.round}"
+        self.ids.next_round_btn.disabled = not tournament.round_complete()
+        box = self.ids.table_list
+        box.clear_widgets()
+        for number, table in sorted(tournament.tables.items()):
+            scores = " / ".join(f"{n} {s}" for n, s in table.game.totals.items())
+            status = " (done)" if table.done else ""
+            box.add_widget(
+                MDRaisedButton(
+                    text=f"Table {number}: {scores}{status}",
+                    disabled=table.done,
+                    on_release=lambda x, n=number: app.switch_table(n),))
+        box.add_widget(MDSeparator(thickness=dp(2)))
+        for rank, name in enumerate(tournament.ranking(), start=1):
+            pts, scored = tournament.standings[name]
+            box.add_widget(
+                MDLabel(
+                    text=f"{rank}. {name} — {pts} wins, {scored} pts",
+                    size_hint_y=None,
+                    height=dp(32),))
+
+    def next_round(self):
+        app = MDApp.get_running_app()
+        if app.tournament and app.tournament.next_round():
+            self.refresh()
+
+    def end_tournament(self):
+        MDApp.get_running_app().end_tournament()
+
 # --------------------------------------------------
 # App
 # --------------------------------------------------
@@ -477,13 +790,45 @@ class GameScreen(MDScreen):
 class DominoApp(MDApp):
     def build(self):
         setup_logger()
-        global DATA_DIR, SAVE_FILE, GAMES_FILE
+        global DATA_DIR, SAVE_FILE, GAMES_FILE, TOURNAMENT_FILE, RESUME_FILE
         DATA_DIR = get_export_dir()
         os.makedirs(DATA_DIR, exist_ok=True)
         SAVE_FILE = os.path.join(DATA_DIR, "players.dom")
         GAMES_FILE = os.path.join(DATA_DIR, "games.dom")
-        self.players = self.load_players()
+        TOURNAMENT_FILE = os.path.join(DATA_DIR, "tournament.dom")
+        RESUME_FILE = os.path.join(DATA_DIR, "resume.dom")
+        self.player_store = PlayerStore(SAVE_FILE)
+        snapshot = self.read_snapshot()
+        self.players = self.snapshot_players(snapshot) or self.load_players()
+        self.index_players()
+        self.history = HistoryStore(GAMES_FILE)
+        self.history_tree = MerkleTree()
+        self.history_tree.attach(self.history)
+        self.sync_state = SyncState(
+            os.path.join(DATA_DIR, "sync.dom"),
+            self.history,
+            self.history_tree,
+            dispatch=self.run_on_main,)
+        self.game_index = GameIndex()
+        self.game_index.attach(self.history)
+        self.player_games = PlayerGames()
+        self.player_games.attach(self.history)
+        self.ratings = RatingEngine()
+        self.ratings.attach(self.history)
+        self.date_index = DateIndex()
+        self.date_index.attach(self.history)
+        self.chart_cache = SeriesCache()
+        self.chart_cache.attach(self.history)
+        self.history_damage = []
+        self.scan_history()
+        if os.environ.get("DOMINO_MEMREPORT"):
+            memory_report(SAVE_FILE, GAMES_FILE)
+        self.sync_server = None
         self.current_game = None
+        self.editing_id = None
+        self.batch_ids = []
+        self.current_table = None
+        self.tournament = Tournament.load(TOURNAMENT_FILE, self.players)
         self.theme_cls.primary_palette = random.choice(COLORS)
         self.theme_cls.theme_style = "Dark"
         font_path = os.path.join(os.path.dirname(__file__), "data", "breakaway.ttf")
@@ -497,8 +842,7 @@ class DominoApp(MDApp):
                 logging.exception("Failed to register BreakAway font")
         else:
             logging.warning("BreakAway font not found, using default")
-        sm = ScreenManager()
-        for cls, name in [
+        screens = [
             (MenuScreen, "menu"),
             (CreatePlayerScreen, "create"),
             (PlayerSelectScreen, "select"),
@@ -506,71 +850,223 @@ class DominoApp(MDApp):
             (OptionsScreen, "options"),
             (HistoryScreen,"history"),
             (EditGameScreen,"edit"),
-        ]:
-            sm.add_widget(cls(name=name))
+            (BatchEditScreen, "batch"),
+            (TournamentScreen, "tournament"),
+            (LeaderboardScreen, "leaderboard"),
+        ]
+        self.profiler = None
+        if os.environ.get("DOMINO_PROFILE"):
+            self.profiler = FrameProfiler(os.path.join(get_data_dir(), "logs"))
+            self.profiler.install([cls for cls, _ in screens])
+        sm = LazyScreenManager(screens)
+        sm.ensure("menu")
+        self.restore_snapshot(sm, snapshot)
+        # Used once; the next pause or stop writes a fresh one
+        self.clear_snapshot()
         return sm
         
-    def save_players(self):
-        data = {
-            "version": 1,
-            "players": {
-                name: {
-                    "wins": player.wins,
-                    "losses": player.losses,}
-                for name, player in self.players.items()}}
-        atomic_write_json(SAVE_FILE, data)
-        
-    def load_players(self):
-        if not os.path.exists(SAVE_FILE):
-            return {}    
-        # Empty file guard
-        if os.path.getsize(SAVE_FILE) == 0:
-            logging.warning("Players save file is empty")
-            return {}    
-        try:
-            with open(SAVE_FILE, "r", encoding="utf-8") as f:
-                data = json.load(f)
-        except json.JSONDecodeError:
-            logging.error("Players save file contains invalid JSON")
+    # ---------- pause / resume ----------
+
+    def _stamps(self):
+        stamps = {}
+        for path in (SAVE_FILE, self.player_store.journal.path):
+            try:
+                st = os.stat(path)
+                stamps[os.path.basename(path)] = [st.st_size, st.st_mtime_ns]
+            except OSError:
+                stamps[os.path.basename(path)] = None
+        return stamps
+
+    def write_snapshot(self):
+        sm = self.root
+        state = {
+            "version": SNAPSHOT_VERSION,
+            "screen": sm.current if sm else "menu",
+            "game": self.current_game.to_dict() if self.current_game else None,
+            "table": self.current_table,
+            "editing_id": self.editing_id,
+            "stamps": self._stamps(),
+            "players": {n: [p.wins, p.losses] for n, p in self.players.items()},
+            "journal": self.player_store.journal.lines,}
+        if sm and "history" not in sm.factories:
+            history = sm.get_screen("history")
+            state["history"] = {
+                "period": history.period,
+                "query": history.ids.history_search.text if ids_ready(history, "history_search") else "",}
+        return atomic_write_json(RESUME_FILE, state, indent=None)
+
+    def read_snapshot(self):
+        snapshot = safe_load_json(RESUME_FILE, {})
+        if snapshot.get("version") != SNAPSHOT_VERSION:
             return {}
-        except Exception:
-            logging.exception("Unexpected error loading players")
-            return {}    
-        players_data = data.get("players")
-        if not isinstance(players_data, dict):
-            logging.error("Players save file has invalid schema")
-            return {}    
-        players = {}
-        for name, stats in players_data.items():
+        return snapshot
+
+    def clear_snapshot(self):
+        try:
+            if os.path.exists(RESUME_FILE):
+                os.remove(RESUME_FILE)
+        except OSError:
+            logging.exception("Failed to clear the resume snapshot")
+
+    def refresh_snapshot(self):
+        # A snapshot from an earlier pause must not bring back a game that
+        # has since ended if the process is killed before the next pause
+        if RESUME_FILE and os.path.exists(RESUME_FILE):
             try:
-                players[name] = Player(
-                    name=name,
-                    wins=int(stats.get("wins", 0)),
-                    losses=int(stats.get("losses", 0)),)
+                self.write_snapshot()
             except Exception:
-                logging.warning(f"Skipping invalid player entry: {name}")    
-        return players
+                logging.exception("Failed to refresh the resume snapshot")
+
+    def snapshot_players(self, snapshot):
+        # Only trusted while players.dom and its journal are untouched
+        if not snapshot.get("players") or snapshot.get("stamps") != self._stamps():
+            return None
+        self.player_store.journal.lines = snapshot.get("journal", 0)
+        return {n: Player(n, w, l) for n, (w, l) in snapshot["players"].items()}
+
+    def restore_snapshot(self, sm, snapshot):
+        if not snapshot:
+            return
+        table = snapshot.get("table")
+        if table is not None and self.tournament and table in self.tournament.tables:
+            self.current_table = table
+            self.current_game = self.tournament.tables[table].game
+        elif snapshot.get("game"):
+            try:
+                self.current_game = GameScore.from_dict(snapshot["game"], self.players)
+            except Exception:
+                logging.exception("Failed to restore the active game")
+        self.editing_id = snapshot.get("editing_id")
+
+        screen = snapshot.get("screen") or "menu"
+        if screen in ("game", "edit") and not self.current_game:
+            screen = "menu"
+        if screen == "tournament" and not self.tournament:
+            screen = "menu"
+        if not sm.has_screen(screen) or screen == "menu":
+            return
+        history = snapshot.get("history")
+        if screen == "history" and history:
+            view = sm.get_screen("history")
+            view.period = history.get("period")
+            if ids_ready(view, "history_search"):
+                view.ids.history_search.text = history.get("query") or ""
+        # Land directly on the screen instead of animating from the menu
+        transition = sm.transition
+        sm.transition = NoTransition()
+        sm.current = screen
+        sm.transition = transition
+        logging.info(f"Resumed on {screen}")
+
+    def drop_caches(self):
+        # Everything here rebuilds lazily from the history index
+        self.history.release()
+        self.chart_cache.invalidate()
+        self.game_index.invalidate()
+        self.history_tree.invalidate()
+        self.ratings.invalidate()
+
+    def on_pause(self):
+        try:
+            self.write_snapshot()
+            index = self.history.mapped.index if self.history.mapped else None
+            if index is not None and index.dirty:
+                index.save()
+        except Exception:
+            logging.exception("Failed to snapshot state on pause")
+        self.drop_caches()
+        return True
+
+    def on_resume(self):
+        # Same process, nothing to reload; screens refresh on their next enter
+        logging.info("Resumed from pause")
+
+    def on_stop(self):
+        try:
+            self.write_snapshot()
+        except Exception:
+            logging.exception("Failed to snapshot state on stop")
+
+    def asset(self, name):
+        return asset_source(name, Metrics.density, os.path.dirname(os.path.abspath(__file__)))
+
+    def save_players(self):
+        self.player_store.save_all(self.players)
+
+    def save_player(self, player):
+        self.player_store.put(player, self.players)
+
+    def index_players(self):
+        self.player_index = PrefixIndex()
+        for name in self.players:
+            self.player_index.add(name, name)
+
+    def load_players(self):
+        return self.player_store.load()
 
     def save_edited_game(self, edited_game):
-        games = safe_load_json(GAMES_FILE, [])
-    
-        # Replace game with same date
-        replaced = False
-        for i, g in enumerate(games):
-            if g.get("date") == edited_game.date:
-                games[i] = edited_game.to_dict()
-                replaced = True
-                break
-    
-        # Fallback: append if not found
-        if not replaced:
-            games.append(edited_game.to_dict())
-    
-        atomic_write_json(GAMES_FILE, games)
-    
+        # Replace the game that was opened, even if its date was edited;
+        # unknown games are appended.
+        replaces = {edited_game.date: self.editing_id} if self.editing_id else None
+        self.history.apply([edited_game.to_dict()], [], replaces)
+        self.editing_id = None
         self.current_game = None
         self.root.current = "history"    
             
+    def batch_edit(self, gids, rename=None, adjust=None):
+        """Apply a rename and/or score adjustment to many games in one write.
+
+        Returns the number of games changed, or None if nothing was written.
+        """
+        changed = 0
+        try:
+            with self.history.transaction() as txn:
+                for gid in gids:
+                    game = txn.get(gid)
+                    if game is None:
+                        continue
+                    touched = rename_in_game(game, *rename) if rename else False
+                    if adjust and adjust_in_game(game, *adjust):
+                        touched = True
+                    if touched:
+                        txn.put(game)
+                        changed += 1
+        except Exception:
+            logging.exception("Batch edit failed; no games were changed")
+            return None
+        return changed if txn.committed else None
+
+    def rename_player(self, old, new):
+        """Rename ``old`` to ``new``, or merge it into ``new`` if that exists.
+
+        Only the games ``old`` played are rewritten, in one transaction,
+        before the roster is touched. Returns the number of games changed,
+        or None if nothing was.
+        """
+        if old not in self.players or not new or old == new:
+            return None
+        in_play = self.current_game is not None and old in self.current_game.totals
+        if in_play or (self.tournament and old in self.tournament.roster):
+            logging.warning(f"Not renaming {old} while they are in a game")
+            return None
+        gids = self.player_games.ensure_built(self.history).games_of(old)
+        changed = self.batch_edit(gids, rename=(old, new))
+        if changed is None:
+            return None
+
+        player = self.players.pop(old)
+        kept = self.players.get(new)
+        if kept is not None:
+            kept.wins += player.wins
+            kept.losses += player.losses
+        else:
+            kept = self.players[new] = Player(new, player.wins, player.losses)
+            self.player_index.add(new, new)
+        self.player_index.remove(old, old)
+        self.player_store.remove(old, self.players)
+        self.player_store.put(kept, self.players)
+        return changed
+
     def start_game(self, names):
         if not names or len(names) < 2:
             return    
@@ -585,18 +1081,154 @@ class DominoApp(MDApp):
             return
     
         self.current_game = GameScore(players)
+        self.current_table = None
+        self.root.current = "game"
+        self.refresh_snapshot()
+
+    def start_tournament(self, names, seats=2):
+        names = [n for n in names if n in self.players]
+        if len(names) < 3:
+            logging.warning("Not enough valid players to start tournament")
+            return
+        if self.tournament:
+            self.tournament.clear()
+        self.tournament = Tournament(TOURNAMENT_FILE, self.players, names, seats)
+        self.tournament.next_round()
+        self.current_game = None
+        self.current_table = None
+        self.root.current = "tournament"
+
+    def switch_table(self, number):
+        # Tables stay live in memory, so switching is just a pointer swap
+        table = self.tournament.tables.get(number) if self.tournament else None
+        if table is None or table.done:
+            return
+        self.current_game = table.game
+        self.current_table = number
         self.root.current = "game"
 
+    def save_current_table(self):
+        if self.tournament and self.current_table is not None:
+            self.tournament.save_table(self.current_table)
+
+    def leave_table(self):
+        self.current_game = None
+        self.current_table = None
+        self.root.current = "tournament"
+        self.refresh_snapshot()
+
+    def run_on_main(self, fn, *args):
+        """Run ``fn`` on the UI thread and wait for its result.
+
+        Sync runs on worker threads; history writes and the indexes that
+        listen to them must only ever change on the UI thread.
+        """
+        if threading.current_thread() is threading.main_thread():
+            return fn(*args)
+        done = threading.Event()
+        outcome = {}
+
+        def call(dt):
+            try:
+                outcome["result"] = fn(*args)
+            except Exception as e:
+                outcome["error"] = e
+            finally:
+                done.set()
+
+        Clock.schedule_once(call)
+        done.wait()
+        if "error" in outcome:
+            raise outcome["error"]
+        return outcome.get("result")
+
+    def start_sync_server(self, callback=None):
+        """Host one sync in the background and return its pairing code.
+
+        ``callback(synced)`` runs on the UI thread when hosting ends.
+        """
+        if self.sync_server and self.sync_server.code:
+            return self.sync_server.code
+        host = self.sync_server = SyncHost(self.sync_state)
+        code = host.code
+
+        def run():
+            synced = False
+            try:
+                synced = asyncio.run(host.serve())
+            except Exception:
+                logging.exception("Sync server stopped")
+            Clock.schedule_once(lambda dt: self.on_sync_server_done(host, synced, callback))
+
+        threading.Thread(target=run, daemon=True).start()
+        return code
+
+    def on_sync_server_done(self, host, synced, callback):
+        if self.sync_server is host:
+            self.sync_server = None
+        if callback:
+            callback(synced)
+
+    def stop_sync_server(self):
+        if self.sync_server:
+            self.sync_server.stop()
+
+    def sync_with_peer(self, host, code, callback):
+        def run():
+            try:
+                result = asyncio.run(sync_with(self.sync_state, host, code))
+            except Exception:
+                logging.exception(f"Sync with {host} failed")
+                result = None
+            Clock.schedule_once(lambda dt: callback(result))
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def scan_history(self):
+        # Integrity check off the UI thread; results land on the next frame
+        def run():
+            try:
+                damage = self.history.scan()
+            except Exception:
+                logging.exception("History integrity scan failed")
+                return
+            Clock.schedule_once(lambda dt: self.on_history_scanned(damage))
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def on_history_scanned(self, damage):
+        self.history_damage = damage
+        if damage:
+            total = sum(length for _, length in damage)
+            logging.warning(
+                f"Game history has {len(damage)} damaged regions ({total} bytes)")
+            if self.root and self.root.current == "history":
+                history = self.root.get_screen("history")
+                history.filter(history.ids.history_search.text)
+
+    def end_tournament(self):
+        if self.tournament:
+            self.tournament.clear()
+        self.tournament = None
+        self.current_game = None
+        self.current_table = None
+        self.root.current = "menu"
+        self.refresh_snapshot()
+
     def finish_game(self):
         game = self.current_game
         if not game:
             return
-        games = safe_load_json(GAMES_FILE, [])
-        games = [g for g in games if g.get("date") != game.date]
-        games.append(game.to_dict())
-        atomic_write_json(GAMES_FILE, games)
+        if self.current_table is not None and self.tournament:
+            self.tournament.finish_table(self.current_table)
+        self.history.save(game.to_dict())
         self.current_game = None
-        self.root.current = "menu"
+        if self.current_table is not None:
+            self.current_table = None
+            self.root.current = "tournament"
+        else:
+            self.root.current = "menu"
+        self.refresh_snapshot()
 
 
 if __name__ == "__main__":
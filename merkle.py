@@ -0,0 +1,164 @@
+import hashlib
+import json
+
+from history import game_id
+
+
+# --------------------------------------------------
+# Merkle digests over history
+# --------------------------------------------------
+
+ROOT = ""
+
+
+def game_hash(game):
+    data = json.dumps(game, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()[:32]
+
+
+def bucket_of(gid):
+    # Game IDs are ISO dates, so the first ten characters are the day
+    return gid[:10]
+
+
+def parent_of(key):
+    # day "2026-01-05" -> month "2026-01" -> year "2026" -> root ""
+    if len(key) == 10:
+        return key[:7]
+    if len(key) == 7:
+        return key[:4]
+    return ROOT
+
+
+def _combine(items):
+    h = hashlib.sha256()
+    for key, value in sorted(items):
+        h.update(key.encode("utf-8"))
+        h.update(value.encode("utf-8"))
+    return h.hexdigest()[:32]
+
+
+class MerkleTree:
+    """Hash tree of games bucketed root -> year -> month -> day.
+
+    Changing one game rehashes its day bucket and the three nodes above
+    it, nothing else. Two trees are compared top down, only descending
+    into nodes whose hashes differ.
+    """
+
+    def __init__(self):
+        self.leaves = {}
+        self.hashes = {}
+        self.children_of = {ROOT: set()}
+        self.built = False
+
+    def build(self, games):
+        self.leaves.clear()
+        self.hashes.clear()
+        self.children_of = {ROOT: set()}
+        touched = set()
+        for game in games:
+            gid = game_id(game)
+            if not gid:
+                continue
+            day = bucket_of(gid)
+            self.leaves.setdefault(day, {})[gid] = game_hash(game)
+            touched.add(day)
+        for day in touched:
+            self._rehash(day)
+        self.built = True
+
+    def attach(self, history):
+        history.subscribe(self.on_history_change, self.invalidate)
+
+    def invalidate(self):
+        self.built = False
+
+    def ensure_built(self, history):
+        if not self.built:
+            self.build(history.all())
+        return self
+
+    def on_history_change(self, upserts, deletes):
+        if not self.built:
+            return
+        touched = set()
+        for gid in deletes:
+            day = bucket_of(gid)
+            if self.leaves.get(day, {}).pop(gid, None) is not None:
+                touched.add(day)
+        for game in upserts:
+            gid = game_id(game)
+            day = bucket_of(gid)
+            self.leaves.setdefault(day, {})[gid] = game_hash(game)
+            touched.add(day)
+        for day in touched:
+            self._rehash(day)
+
+    def _rehash(self, day):
+        leaf = self.leaves.get(day)
+        if leaf:
+            self.hashes[day] = _combine(leaf.items())
+        else:
+            self.leaves.pop(day, None)
+            self.hashes.pop(day, None)
+        key = day
+        while key != ROOT:
+            parent = parent_of(key)
+            kids = self.children_of.setdefault(parent, set())
+            if key in self.hashes:
+                kids.add(key)
+            else:
+                kids.discard(key)
+            if kids:
+                self.hashes[parent] = _combine((k, self.hashes[k]) for k in kids)
+            else:
+                self.hashes.pop(parent, None)
+                if parent != ROOT:
+                    self.children_of.pop(parent, None)
+            key = parent
+
+    # ---------- queries ----------
+
+    def root(self):
+        return self.hashes.get(ROOT, "")
+
+    def node_hash(self, key):
+        return self.hashes.get(key, "")
+
+    def children(self, key=ROOT):
+        """Child hashes under one node, the unit that would cross the wire."""
+        if len(key) == 10:
+            return {}
+        return {k: self.hashes[k] for k in self.children_of.get(key, ())}
+
+    def day_hashes(self):
+        return {day: self.hashes[day] for day in self.leaves}
+
+    def diff(self, other):
+        """Return the sorted day buckets whose contents differ from ``other``.
+
+        ``other`` only needs ``node_hash`` and ``children``, so a remote
+        peer can answer level by level.
+        """
+        out = []
+        stack = [ROOT]
+        while stack:
+            key = stack.pop()
+            if self.node_hash(key) == other.node_hash(key):
+                continue
+            if len(key) == 10:
+                out.append(key)
+                continue
+            mine = self.children(key)
+            theirs = other.children(key)
+            for child in set(mine) | set(theirs):
+                if mine.get(child) != theirs.get(child):
+                    stack.append(child)
+        return sorted(out)
+
+
+def diff_days(local, remote_days):
+    """Differing day buckets given a flat ``{day: hash}`` from a peer."""
+    mine = local.day_hashes()
+    return sorted(d for d in set(mine) | set(remote_days) if mine.get(d) != remote_days.get(d))
@@ -0,0 +1,74 @@
+from datetime import datetime
+
+
+MAX_POINTS = 300
+
+
+# --------------------------------------------------
+# Models
+# --------------------------------------------------
+#
+# Slotted so a large roster or history loaded as objects carries no
+# per-instance __dict__. Rounds are (player, points) tuples for the same
+# reason, and serialize as two-element lists.
+
+class Player:
+    __slots__ = ("name", "wins", "losses")
+
+    def __init__(self, name, wins=0, losses=0):
+        self.name = name
+        self.wins = wins
+        self.losses = losses
+
+    def to_dict(self):
+        return {"name": self.name, "wins": self.wins, "losses": self.losses}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
+
+
+class GameScore:
+    __slots__ = ("date", "players", "totals", "rounds", "finished")
+
+    def __init__(self, players):
+        self.date = datetime.now().isoformat()
+        self.players = players
+        self.totals = {p.name: 0 for p in players}
+        self.rounds = []
+        self.finished = False
+
+    def add_points(self, name, pts):
+        self.totals[name] += pts
+        self.rounds.append((name, pts))
+        self.finished = any(total >= MAX_POINTS for total in self.totals.values())
+
+    def winner(self):
+        if not self.totals:
+            return None
+        if not self.finished:
+            return None
+        return max(self.totals.items(), key=lambda x: x[1])[0]
+
+    def to_dict(self):
+        return {
+            "date": self.date,
+            "totals": self.totals,
+            "winner": self.winner(),
+            "finished": self.finished,
+            "rounds": [list(r) for r in self.rounds],}
+
+    @classmethod
+    def from_dict(cls, data, players=None):
+        game = cls([])
+        game.date = data["date"]
+        game.totals = dict(data["totals"])
+        game.finished = data.get("finished", False)
+        # Reuse the totals' key strings so rounds do not duplicate names
+        names = {n: n for n in game.totals}
+        game.rounds = [(names.get(n, n), p) for n, p in data.get("rounds") or ()]
+        if players is None:
+            game.players = [Player(n) for n in game.totals]
+        else:
+            game.players = [players.get(n) or Player(n) for n in game.totals]
+        return game
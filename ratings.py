@@ -0,0 +1,139 @@
+import bisect
+
+from history import game_id
+
+
+# --------------------------------------------------
+# Ratings
+# --------------------------------------------------
+
+DEFAULT_RATING = 1500.0
+K_FACTOR = 32.0
+CHECKPOINT_EVERY = 50
+
+
+def rate_game(ratings, totals):
+    """Update ``ratings`` in place from one game's final totals.
+
+    Multi-player Elo: each player is scored against the field by finishing
+    position (ties split) and expected to do as well as their rating
+    versus the mean of their opponents. Linear in the number of players.
+    """
+    n = len(totals)
+    if n < 2:
+        return
+    for name in totals:
+        ratings.setdefault(name, DEFAULT_RATING)
+    field = sum(ratings[name] for name in totals)
+    scores = sorted(totals.values())
+    deltas = {}
+    for name, total in totals.items():
+        below = bisect.bisect_left(scores, total)
+        ties = bisect.bisect_right(scores, total) - below - 1
+        actual = (below + 0.5 * ties) / (n - 1)
+        others = (field - ratings[name]) / (n - 1)
+        expected = 1.0 / (1.0 + 10 ** ((others - ratings[name]) / 400.0))
+        deltas[name] = K_FACTOR * (actual - expected)
+    for name, delta in deltas.items():
+        ratings[name] += delta
+
+
+class RatingEngine:
+    """Ratings over the whole history, kept current as games change.
+
+    Games are replayed in date order. A snapshot of all ratings is kept
+    every ``CHECKPOINT_EVERY`` games, so a new game costs one update and
+    an edit or delete replays only from the checkpoint before it.
+    """
+
+    def __init__(self, checkpoint_every=CHECKPOINT_EVERY):
+        self.checkpoint_every = checkpoint_every
+        self.order = []
+        self.totals = {}
+        self.ratings = {}
+        self.played = {}
+        self.checkpoints = {0: ({}, {})}
+        self.built = False
+
+    def attach(self, history):
+        history.subscribe(self.on_history_change, self.invalidate)
+
+    def invalidate(self):
+        self.order = []
+        self.totals = {}
+        self.ratings = {}
+        self.played = {}
+        self.checkpoints = {0: ({}, {})}
+        self.built = False
+
+    def ensure_built(self, history):
+        if not self.built:
+            for game in history.summaries():
+                gid = game_id(game)
+                # Unfinished games have no result to rate yet
+                if gid and game.get("finished"):
+                    self.totals[gid] = dict(game.get("totals") or {})
+            self.order = sorted(self.totals)
+            self._replay(0)
+            self.built = True
+        return self
+
+    def _apply(self, index):
+        totals = self.totals[self.order[index]]
+        rate_game(self.ratings, totals)
+        for name in totals:
+            self.played[name] = self.played.get(name, 0) + 1
+        done = index + 1
+        if done % self.checkpoint_every == 0:
+            self.checkpoints[done] = (dict(self.ratings), dict(self.played))
+
+    def _replay(self, start):
+        base = start - start % self.checkpoint_every
+        while base not in self.checkpoints:
+            base -= self.checkpoint_every
+        for k in [k for k in self.checkpoints if k > base]:
+            del self.checkpoints[k]
+        ratings, played = self.checkpoints[base]
+        self.ratings = dict(ratings)
+        self.played = dict(played)
+        for index in range(base, len(self.order)):
+            self._apply(index)
+
+    def on_history_change(self, upserts, deletes):
+        if not self.built:
+            return
+        last = self.order[-1] if self.order else ""
+        rated = len(self.order)
+        changed = []
+        for gid in deletes:
+            if self.totals.pop(gid, None) is not None:
+                del self.order[bisect.bisect_left(self.order, gid)]
+                changed.append(gid)
+        for game in upserts:
+            gid = game_id(game)
+            if not gid:
+                continue
+            if not game.get("finished"):
+                # An edit can un-finish a game; drop it like a delete
+                if self.totals.pop(gid, None) is not None:
+                    del self.order[bisect.bisect_left(self.order, gid)]
+                    changed.append(gid)
+                continue
+            if gid not in self.totals:
+                bisect.insort(self.order, gid)
+            self.totals[gid] = dict(game.get("totals") or {})
+            changed.append(gid)
+        if not changed:
+            return
+        if not deletes and len(self.order) == rated + len(changed) and min(changed) > last:
+            # Only new games after everything rated so far: O(players) each
+            for index in range(rated, len(self.order)):
+                self._apply(index)
+            return
+        self._replay(min(bisect.bisect_left(self.order, gid) for gid in changed))
+
+    def leaderboard(self):
+        return sorted(
+            ((name, rating, self.played.get(name, 0)) for name, rating in self.ratings.items()),
+            key=lambda row: row[1],
+            reverse=True,)
@@ -0,0 +1,177 @@
+"""League-wide reports from many games.dom exports.
+
+Reads every games*.dom file under a directory (one per device, as copied
+out of Download/DominoScorebook), merges games seen on more than one
+device and writes standings and stats. Kivy is not needed:
+
+    python report.py exports/ --out reports/ --jobs 8
+
+Files are parsed in a process pool; each worker returns one compact row
+per game so the merge in the parent stays cheap next to the parsing.
+"""
+import argparse
+import csv
+import json
+import logging
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from history import game_id, iter_games
+from merkle import game_hash
+from ratings import DEFAULT_RATING, rate_game
+
+
+# --------------------------------------------------
+# Parsing (workers)
+# --------------------------------------------------
+
+def find_exports(directory):
+    found = []
+    for root, _, files in os.walk(directory):
+        for name in files:
+            if name.startswith("games") and name.endswith(".dom"):
+                found.append(os.path.join(root, name))
+    return sorted(found)
+
+
+def summarize(game):
+    totals = {str(k): v for k, v in (game.get("totals") or {}).items()
+              if isinstance(v, (int, float))}
+    return (
+        game_id(game),
+        game_hash(game),
+        totals,
+        bool(game.get("finished", game.get("winner") is not None)),
+        len(game.get("rounds") or ()),)
+
+
+def parse_export(path):
+    """Return (path, rows, damage) for one export; damaged files are salvaged.
+
+    ``damage`` counts the regions and bytes skipped to salvage the file,
+    with the error that stopped reading it, if any.
+    """
+    rows = []
+    damage = {"regions": 0, "bytes": 0, "error": None}
+    try:
+        for game in iter_games(path, salvage=True, damage=damage):
+            if isinstance(game, dict) and game_id(game):
+                rows.append(summarize(game))
+    except Exception as e:
+        damage["error"] = str(e)
+    return path, rows, damage
+
+
+# --------------------------------------------------
+# Merging and aggregation
+# --------------------------------------------------
+
+def _prefer(a, b):
+    # Same game from two devices: the finished copy with more rounds wins,
+    # the hash breaks ties so every run picks the same copy
+    return max(a, b, key=lambda row: (row[3], row[4], row[1]))
+
+
+def merge(results):
+    games = {}
+    stats = {"files": 0, "damaged_files": [], "rows": 0, "duplicates": 0, "conflicts": 0}
+    for path, rows, damage in results:
+        stats["files"] += 1
+        stats["rows"] += len(rows)
+        if damage["regions"] or damage["error"]:
+            stats["damaged_files"].append(dict(damage, path=path))
+        for row in rows:
+            seen = games.get(row[0])
+            if seen is None:
+                games[row[0]] = row
+                continue
+            stats["duplicates"] += 1
+            if seen[1] != row[1]:
+                stats["conflicts"] += 1
+                games[row[0]] = _prefer(seen, row)
+    return games, stats
+
+
+def standings(games):
+    table = {}
+    ratings = {}
+    for gid in sorted(games):
+        _, _, totals, finished, _ = games[gid]
+        if not totals:
+            continue
+        top = max(totals.values())
+        for name, total in totals.items():
+            row = table.setdefault(name, {
+                "player": name, "games": 0, "wins": 0, "points": 0, "best": 0})
+            row["games"] += 1
+            row["points"] += total
+            row["best"] = max(row["best"], total)
+            if finished and total == top:
+                row["wins"] += 1
+        if finished:
+            rate_game(ratings, totals)
+    for name, row in table.items():
+        row["rating"] = round(ratings.get(name, DEFAULT_RATING), 1)
+        row["win_rate"] = round(row["wins"] / row["games"], 3) if row["games"] else 0.0
+        row["avg_points"] = round(row["points"] / row["games"], 1) if row["games"] else 0.0
+    return sorted(table.values(), key=lambda r: (-r["rating"], -r["wins"], r["player"]))
+
+
+STANDING_FIELDS = ["player", "rating", "games", "wins", "win_rate", "points", "avg_points", "best"]
+
+
+def write_report(out_dir, rows, games, stats):
+    os.makedirs(out_dir, exist_ok=True)
+    with open(os.path.join(out_dir, "standings.csv"), "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=STANDING_FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+    dates = sorted(games)
+    summary = dict(
+        stats,
+        games=len(games),
+        finished=sum(1 for g in games.values() if g[3]),
+        rounds=sum(g[4] for g in games.values()),
+        players=len(rows),
+        first=dates[0] if dates else None,
+        last=dates[-1] if dates else None,)
+    with open(os.path.join(out_dir, "stats.json"), "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+    return summary
+
+
+def run(directory, out_dir, jobs=None):
+    paths = find_exports(directory)
+    if not paths:
+        logging.warning(f"No games exports found under {directory}")
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        # Largest files first so one big export does not finish last alone
+        paths.sort(key=os.path.getsize, reverse=True)
+        results = list(pool.map(parse_export, paths))
+    games, stats = merge(results)
+    return write_report(out_dir, standings(games), games, stats)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Standings and stats across games.dom exports")
+    parser.add_argument("directory", help="directory holding games*.dom exports")
+    parser.add_argument("--out", default=None, help="output directory (default: <directory>/report)")
+    parser.add_argument("--jobs", type=int, default=None, help="worker processes (default: all cores)")
+    args = parser.parse_args(argv)
+    out_dir = args.out or os.path.join(args.directory, "report")
+    summary = run(args.directory, out_dir, args.jobs)
+    print(
+        f"{summary['files']} files, {summary['games']} games "
+        f"({summary['duplicates']} duplicates, {summary['conflicts']} conflicts), "
+        f"{summary['players']} players -> {out_dir}")
+    for damaged in summary["damaged_files"]:
+        print(
+            f"  {damaged['path']}: skipped {damaged['bytes']} bytes in "
+            f"{damaged['regions']} damaged regions" +
+            (f" ({damaged['error']})" if damaged["error"] else ""))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,141 @@
+import bisect
+
+from history import game_id
+
+
+# --------------------------------------------------
+# Prefix search
+# --------------------------------------------------
+
+class _Node:
+    __slots__ = ("children", "values")
+
+    def __init__(self):
+        self.children = {}
+        # Kept sorted so lookups return values in a stable order
+        self.values = []
+
+
+def tokens(text):
+    """Every searchable suffix of a key: the whole string and each word."""
+    text = text.lower().strip()
+    out = {text}
+    out.update(w for w in text.split() if w)
+    return out
+
+
+class PrefixIndex:
+    """Trie from lowercase keys to values, with bounded lookups.
+
+    A lookup walks ``len(prefix)`` nodes and then collects at most
+    ``limit`` values, so its cost does not depend on how many keys are
+    stored. Empty branches are pruned on removal to keep that true.
+    """
+
+    def __init__(self, newest_first=False):
+        self.root = _Node()
+        self.newest_first = newest_first
+
+    def add(self, key, value):
+        for token in tokens(key):
+            node = self.root
+            for ch in token:
+                node = node.children.setdefault(ch, _Node())
+            i = bisect.bisect_left(node.values, value)
+            if i == len(node.values) or node.values[i] != value:
+                node.values.insert(i, value)
+
+    def remove(self, key, value):
+        for token in tokens(key):
+            path = [self.root]
+            for ch in token:
+                node = path[-1].children.get(ch)
+                if node is None:
+                    break
+                path.append(node)
+            else:
+                values = path[-1].values
+                i = bisect.bisect_left(values, value)
+                if i < len(values) and values[i] == value:
+                    del values[i]
+                for depth in range(len(token), 0, -1):
+                    node = path[depth]
+                    if node.values or node.children:
+                        break
+                    del path[depth - 1].children[token[depth - 1]]
+
+    def search(self, prefix, limit=50):
+        node = self.root
+        for ch in prefix.lower().strip():
+            node = node.children.get(ch)
+            if node is None:
+                return []
+        out = []
+        seen = set()
+        stack = [node]
+        while stack and len(out) < limit:
+            node = stack.pop()
+            for value in (reversed(node.values) if self.newest_first else node.values):
+                if len(out) >= limit:
+                    break
+                if value not in seen:
+                    seen.add(value)
+                    out.append(value)
+            # Pushed in reverse so the smallest (or newest) key pops first
+            stack.extend(
+                node.children[ch]
+                for ch in sorted(node.children, reverse=not self.newest_first))
+        return out
+
+
+# --------------------------------------------------
+# Indexes over app data
+# --------------------------------------------------
+
+class GameIndex(PrefixIndex):
+    """Games searchable by date prefix or by any player's name."""
+
+    def __init__(self):
+        super().__init__(newest_first=True)
+        self.keys = {}
+        self.built = False
+
+    def _keys_for(self, game):
+        return [game_id(game)] + list((game.get("totals") or {}).keys())
+
+    def add_game(self, game):
+        gid = game_id(game)
+        if not gid:
+            return
+        self.remove_game(gid)
+        keys = self._keys_for(game)
+        self.keys[gid] = keys
+        for key in keys:
+            self.add(key, gid)
+
+    def remove_game(self, gid):
+        for key in self.keys.pop(gid, ()):
+            self.remove(key, gid)
+
+    def attach(self, history):
+        history.subscribe(self.on_history_change, self.invalidate)
+
+    def invalidate(self):
+        self.root = _Node()
+        self.keys.clear()
+        self.built = False
+
+    def ensure_built(self, history):
+        if not self.built:
+            for game in history.summaries():
+                self.add_game(game)
+            self.built = True
+        return self
+
+    def on_history_change(self, upserts, deletes):
+        if not self.built:
+            return
+        for gid in deletes:
+            self.remove_game(gid)
+        for game in upserts:
+            self.add_game(game)
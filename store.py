@@ -0,0 +1,245 @@
+import json
+import logging
+import os
+
+from models import Player
+
+
+# --------------------------------------------------
+# JSON files
+# --------------------------------------------------
+
+def safe_load_json(path, default):
+    if not path or not os.path.exists(path):
+        return default
+    try:
+        if os.path.getsize(path) == 0:
+            return default
+    except Exception:
+        return default
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data if isinstance(data, type(default)) else default
+    except Exception:
+        logging.exception(f"Failed to load JSON: {path}")
+        return default
+
+def atomic_write_json(path, data, indent=2):
+    tmp_path = f"{path}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=indent, separators=None if indent else (",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)  # atomic on Android/Linux
+    except Exception:
+        logging.exception(f"Failed atomic write: {path}")
+        try:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        except Exception:
+            pass
+        return False
+    return True
+
+
+# --------------------------------------------------
+# Append-only record log
+# --------------------------------------------------
+
+def trim_partial_line(f):
+    """Cut an unterminated last line off a file opened "r+b"; return the new end.
+
+    An interrupted append leaves such a line behind, and anything appended
+    after it would be glued onto it and lost with it.
+    """
+    end = f.seek(0, os.SEEK_END)
+    if end == 0:
+        return 0
+    f.seek(end - 1)
+    if f.read(1) == b"\n":
+        return end
+    pos = end
+    cut = 0
+    while pos > 0:
+        step = min(4096, pos)
+        pos -= step
+        f.seek(pos)
+        i = f.read(step).rfind(b"\n")
+        if i >= 0:
+            cut = pos + i + 1
+            break
+    logging.warning(f"Dropping {end - cut} bytes of an interrupted write in {f.name}")
+    f.truncate(cut)
+    return cut
+
+
+class RecordLog:
+    """JSON-lines file where each line is one keyed record.
+
+    Writes append a single line, so updating one record costs one small
+    write no matter how many records the log holds. On load the last
+    record for each key wins. Once stale lines outnumber live records by
+    ``compact_ratio`` the log is rewritten atomically with live records only.
+    """
+
+    def __init__(self, path, key, compact_ratio=4):
+        self.path = path
+        self.key = key
+        self.compact_ratio = compact_ratio
+        self.lines = 0
+        self.deleted = set()
+
+    def load(self):
+        records = {}
+        self.lines = 0
+        self.deleted = set()
+        if not self.path or not os.path.exists(self.path):
+            return records
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # Torn tail from an interrupted append
+                        logging.warning(f"Skipping unreadable record in {self.path}")
+                        continue
+                    self.lines += 1
+                    k = self.key(record)
+                    if record.get("deleted"):
+                        records.pop(k, None)
+                        self.deleted.add(k)
+                    else:
+                        records[k] = record
+                        self.deleted.discard(k)
+        except Exception:
+            logging.exception(f"Failed to load record log: {self.path}")
+        return records
+
+    def append(self, *records):
+        data = "".join(json.dumps(r, separators=(",", ":")) + "\n" for r in records)
+        try:
+            with open(self.path, "r+b" if os.path.exists(self.path) else "w+b") as f:
+                start = trim_partial_line(f)
+                f.seek(start)
+                try:
+                    f.write(data.encode("utf-8"))
+                    f.flush()
+                    os.fsync(f.fileno())
+                except Exception:
+                    f.truncate(start)
+                    raise
+            self.lines += len(records)
+        except Exception:
+            logging.exception(f"Failed to append to record log: {self.path}")
+
+    def delete(self, key_record):
+        self.append(dict(key_record, deleted=True))
+
+    def needs_compaction(self, live):
+        return self.lines > max(live, 1) * self.compact_ratio
+
+    def compact(self, records):
+        records = list(records)
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                for record in records:
+                    f.write(json.dumps(record, separators=(",", ":")))
+                    f.write("\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+            self.lines = len(records)
+        except Exception:
+            logging.exception(f"Failed to compact record log: {self.path}")
+            try:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+            except Exception:
+                pass
+
+    def clear(self):
+        try:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+        except Exception:
+            logging.exception(f"Failed to remove record log: {self.path}")
+        self.lines = 0
+
+
+# --------------------------------------------------
+# Players
+# --------------------------------------------------
+
+class PlayerStore:
+    """players.dom plus a journal of per-player patches.
+
+    Saving one player appends a single line to ``players.dom.log``. The
+    journal is folded back into players.dom once it holds more than
+    ``compact_every`` patches, or whenever the full roster is saved.
+    """
+
+    def __init__(self, path, compact_every=64):
+        self.path = path
+        self.journal = RecordLog(f"{path}.log", key=lambda r: r["name"])
+        self.compact_every = compact_every
+
+    def load(self):
+        players = {}
+        data = safe_load_json(self.path, {})
+        players_data = data.get("players", {})
+        if not isinstance(players_data, dict):
+            logging.error("Players save file has invalid schema")
+            players_data = {}
+        for name, stats in players_data.items():
+            self._load_one(players, name, stats)
+        # Patches newer than the last compaction win over the base file
+        for name, stats in self.journal.load().items():
+            self._load_one(players, name, stats)
+        for name in self.journal.deleted:
+            players.pop(name, None)
+        return players
+
+    def _load_one(self, players, name, stats):
+        try:
+            players[name] = Player(
+                name=name,
+                wins=int(stats.get("wins", 0)),
+                losses=int(stats.get("losses", 0)),)
+        except Exception:
+            logging.warning(f"Skipping invalid player entry: {name}")
+
+    def reset(self):
+        """Forget local patches so players.dom alone is the roster.
+
+        For imports: the copied-in file replaces the roster, and patches
+        or deletes recorded against the old one must not land on it.
+        """
+        self.journal.clear()
+
+    def put(self, player, players):
+        self.journal.append({"name": player.name, "wins": player.wins, "losses": player.losses})
+        if self.journal.lines > self.compact_every:
+            self.save_all(players)
+
+    def remove(self, name, players):
+        self.journal.delete({"name": name})
+        if self.journal.lines > self.compact_every:
+            self.save_all(players)
+
+    def save_all(self, players):
+        data = {
+            "version": 1,
+            "players": {
+                name: {
+                    "wins": player.wins,
+                    "losses": player.losses,}
+                for name, player in players.items()}}
+        if atomic_write_json(self.path, data):
+            self.journal.clear()
@@ -0,0 +1,398 @@
+import asyncio
+import hmac
+import json
+import logging
+import secrets
+import uuid
+
+from history import game_id
+from merkle import MerkleTree, bucket_of, diff_days
+from store import RecordLog
+
+
+SYNC_PORT = 8765
+# A hosting session ends after this many wrong codes or idle seconds
+MAX_DENIED = 5
+HOST_TIMEOUT = 300
+# One message carries a whole batch of records, so allow long lines
+STREAM_LIMIT = 32 * 1024 * 1024
+DEVICE_KEY = ".device"
+
+
+def new_pairing_code():
+    """Six-digit code the hosting device shows and the joining one types in."""
+    return f"{secrets.randbelow(10 ** 6):06d}"
+
+
+def _call(fn, *args):
+    return fn(*args)
+
+
+# --------------------------------------------------
+# Version vectors
+# --------------------------------------------------
+
+def vv_compare(a, b):
+    """Return 1 if a dominates b, -1 if b dominates a, 0 if equal, None if concurrent."""
+    greater = less = False
+    for dev in set(a) | set(b):
+        x, y = a.get(dev, 0), b.get(dev, 0)
+        if x > y:
+            greater = True
+        elif x < y:
+            less = True
+    if greater and less:
+        return None
+    if greater:
+        return 1
+    if less:
+        return -1
+    return 0
+
+
+def vv_merge(a, b):
+    return {dev: max(a.get(dev, 0), b.get(dev, 0)) for dev in set(a) | set(b)}
+
+
+# --------------------------------------------------
+# Sync state
+# --------------------------------------------------
+
+class SyncState:
+    """Per-game version vectors for one device, kept in a record log.
+
+    Local writes to the history bump this device's counter for each
+    touched game; deletes leave a tombstone so they propagate too.
+
+    The protocol runs on a worker thread. Everything that changes the
+    history, the tree or the vectors goes through ``dispatch(fn, *args)``,
+    which the app points at its UI thread; the default calls directly.
+    """
+
+    def __init__(self, path, history, tree=None, dispatch=None):
+        self.history = history
+        self.dispatch = dispatch or _call
+        if tree is None:
+            tree = MerkleTree()
+            tree.attach(history)
+        self.tree = tree
+        self.log = RecordLog(path, key=lambda r: r["id"])
+        self.versions = self.log.load()
+        device = self.versions.pop(DEVICE_KEY, None)
+        if device:
+            self.device = device["device"]
+        else:
+            self.device = uuid.uuid4().hex[:12]
+            self.log.append({"id": DEVICE_KEY, "device": self.device})
+        self._applying = False
+        history.subscribe(self.on_history_change)
+
+    def on_history_change(self, upserts, deletes):
+        if self._applying:
+            return
+        changed = []
+        for game in upserts:
+            changed.append(self._bump(game_id(game), tomb=False))
+        for gid in deletes:
+            changed.append(self._bump(gid, tomb=True))
+        if changed:
+            self.log.append(*changed)
+
+    def _bump(self, gid, tomb):
+        vv = dict(self.versions.get(gid, {}).get("vv", {}))
+        vv[self.device] = vv.get(self.device, 0) + 1
+        record = {"id": gid, "vv": vv}
+        if tomb:
+            record["tomb"] = True
+        self.versions[gid] = record
+        return record
+
+    def summary(self, days=None):
+        return self.dispatch(self._summary, days)
+
+    def _summary(self, days):
+        # Games written before sync existed have no vector yet
+        missing = [gid for gid in self.history.ids() if gid not in self.versions]
+        if missing:
+            self.log.append(*(self._bump(gid, tomb=False) for gid in missing))
+        if days is None:
+            return {gid: r["vv"] for gid, r in self.versions.items()}
+        return {gid: r["vv"] for gid, r in self.versions.items() if bucket_of(gid) in days}
+
+    def day_hashes(self):
+        return self.dispatch(self._day_hashes)
+
+    def _day_hashes(self):
+        return self.tree.ensure_built(self.history).day_hashes()
+
+    def diff_days(self, remote_days):
+        return self.dispatch(lambda: diff_days(self.tree.ensure_built(self.history), remote_days))
+
+    def record(self, gid):
+        meta = self.versions.get(gid)
+        if meta is None:
+            return None
+        game = None if meta.get("tomb") else self.history.get(gid)
+        return {"id": gid, "vv": meta["vv"], "game": game}
+
+    def apply_remote(self, records):
+        return self.dispatch(self._apply_remote, records)
+
+    def _apply_remote(self, records):
+        upserts, deletes, metas = [], [], []
+        for r in records:
+            meta = {"id": r["id"], "vv": r["vv"]}
+            if r.get("game") is None:
+                meta["tomb"] = True
+                deletes.append(r["id"])
+            else:
+                upserts.append(r["game"])
+            self.versions[r["id"]] = meta
+            metas.append(meta)
+        if not metas:
+            return
+        self._applying = True
+        try:
+            self.history.apply(upserts, deletes)
+        finally:
+            self._applying = False
+        self.log.append(*metas)
+        if self.log.needs_compaction(len(self.versions) + 1):
+            device = {"id": DEVICE_KEY, "device": self.device}
+            self.log.compact([device] + list(self.versions.values()))
+
+    def set_versions(self, merged):
+        return self.dispatch(self._set_versions, merged)
+
+    def _set_versions(self, merged):
+        metas = []
+        for gid, vv in merged.items():
+            meta = dict(self.versions.get(gid, {"id": gid}), vv=vv)
+            self.versions[gid] = meta
+            metas.append(meta)
+        if metas:
+            self.log.append(*metas)
+
+
+# --------------------------------------------------
+# Protocol
+# --------------------------------------------------
+#
+# Newline-delimited JSON, one exchange per connection:
+#   client -> {"type": "hello", "pair": code, "days": {day: hash}}
+#   server -> {"type": "diff", "days": [day, ...]}  or  {"type": "denied"}
+#   client -> {"type": "versions", "versions": {id: vv}}
+#   server -> {"type": "delta", "records": [...], "want": {id: merged vv}}
+#   client -> {"type": "records", "records": [...]}
+#   server -> {"type": "done"}
+# Day digests narrow the exchange to buckets that differ, then only
+# records whose vectors differ ever cross the wire. The pairing code shown
+# on the hosting device must match, or the server closes without reading
+# or changing anything.
+
+async def _send(writer, message):
+    writer.write(json.dumps(message, separators=(",", ":")).encode("utf-8") + b"\n")
+    await writer.drain()
+
+
+async def _recv(reader):
+    line = await reader.readline()
+    if not line:
+        raise ConnectionError("Sync peer closed the connection")
+    return json.loads(line)
+
+
+def plan(state, remote_versions, days=None):
+    local_versions = state.summary(days)
+    send, want = [], {}
+    for gid in set(local_versions) | set(remote_versions):
+        mine = local_versions.get(gid)
+        theirs = remote_versions.get(gid)
+        if theirs is None:
+            send.append(state.record(gid))
+            continue
+        if mine is None:
+            want[gid] = theirs
+            continue
+        order = vv_compare(mine, theirs)
+        if order == 0:
+            continue
+        if order == 1:
+            send.append(state.record(gid))
+        elif order == -1:
+            want[gid] = theirs
+        else:
+            # Concurrent edits: the copy with more writes behind it wins,
+            # ties go to the server, and both ends adopt the merged vector.
+            merged = vv_merge(mine, theirs)
+            if sum(theirs.values()) > sum(mine.values()):
+                want[gid] = merged
+            else:
+                send.append(dict(state.record(gid), vv=merged))
+                state.set_versions({gid: merged})
+    return send, want
+
+
+async def handle_sync(state, reader, writer, code):
+    """Serve one exchange: True once synced, False if the code was wrong."""
+    try:
+        hello = await _recv(reader)
+        if hello.get("type") != "hello":
+            return None
+        pair = str(hello.get("pair") or "")
+        if not code or not hmac.compare_digest(pair.encode("utf-8"), code.encode("utf-8")):
+            logging.warning(f"Sync refused: wrong pairing code from {hello.get('device')}")
+            await _send(writer, {"type": "denied"})
+            return False
+        days = state.diff_days(hello.get("days", {}))
+        await _send(writer, {"type": "diff", "days": days})
+        if not days:
+            return True
+        versions = await _recv(reader)
+        send, want = plan(state, versions.get("versions", {}), set(days))
+        await _send(writer, {"type": "delta", "records": send, "want": want})
+        reply = await _recv(reader)
+        records = reply.get("records", [])
+        for r in records:
+            if r["id"] in want:
+                r["vv"] = vv_merge(r["vv"], want[r["id"]])
+        state.apply_remote(records)
+        await _send(writer, {"type": "done", "sent": len(send), "received": len(records)})
+        return True
+    except Exception:
+        logging.exception("Sync server exchange failed")
+        return None
+    finally:
+        writer.close()
+
+
+async def sync_client(state, reader, writer, code):
+    try:
+        hello = {"type": "hello", "device": state.device, "pair": code, "days": state.day_hashes()}
+        await _send(writer, hello)
+        diff = await _recv(reader)
+        if diff.get("type") == "denied":
+            raise PermissionError("Sync peer rejected the pairing code")
+        days = diff.get("days", [])
+        if not days:
+            return 0, 0
+        await _send(writer, {"type": "versions", "versions": state.summary(set(days))})
+        delta = await _recv(reader)
+        state.apply_remote(delta.get("records", []))
+        want = delta.get("want", {})
+        records = []
+        for gid, merged in want.items():
+            r = state.record(gid)
+            if r is not None:
+                records.append(dict(r, vv=vv_merge(r["vv"], merged)))
+        state.set_versions({r["id"]: r["vv"] for r in records})
+        await _send(writer, {"type": "records", "records": records})
+        done = await _recv(reader)
+        return len(delta.get("records", [])), done.get("received", 0)
+    finally:
+        writer.close()
+
+
+class SyncHost:
+    """One hosting session, good for a single sync.
+
+    The pairing code is spent by the first exchange that uses it. The
+    server closes after that, after ``max_denied`` wrong codes, after
+    ``timeout`` seconds or when ``stop`` is called from another thread.
+    """
+
+    def __init__(self, state, code=None, max_denied=MAX_DENIED, timeout=HOST_TIMEOUT):
+        self.state = state
+        self.code = code or new_pairing_code()
+        self.max_denied = max_denied
+        self.timeout = timeout
+        self.denied = 0
+        self.synced = False
+        self.port = None
+        self.loop = None
+        self.finished = None
+        self.stopping = False
+        self.busy = None
+
+    async def _handle(self, reader, writer):
+        # One exchange at a time, so a code can only ever be used once
+        async with self.busy:
+            if self.finished.is_set():
+                writer.close()
+                return
+            ok = await handle_sync(self.state, reader, writer, self.code)
+            if ok:
+                self.synced = True
+                self.code = None
+                self.finished.set()
+            elif ok is False:
+                self.denied += 1
+                if self.denied >= self.max_denied:
+                    logging.warning(f"Sync hosting stopped after {self.denied} wrong codes")
+                    self.code = None
+                    self.finished.set()
+
+    async def serve(self, host="0.0.0.0", port=SYNC_PORT):
+        """Accept peers until the session ends; True if a sync completed."""
+        self.loop = asyncio.get_running_loop()
+        self.finished = asyncio.Event()
+        self.busy = asyncio.Lock()
+        if self.stopping:
+            return False
+        server = await asyncio.start_server(self._handle, host, port, limit=STREAM_LIMIT)
+        self.port = server.sockets[0].getsockname()[1]
+        async with server:
+            try:
+                await asyncio.wait_for(self.finished.wait(), self.timeout)
+            except asyncio.TimeoutError:
+                logging.info("Sync hosting timed out")
+            self.code = None
+        return self.synced
+
+    def stop(self):
+        """End the session; safe to call from any thread."""
+        self.stopping = True
+        if self.loop is not None and self.finished is not None:
+            self.loop.call_soon_threadsafe(self.finished.set)
+
+
+async def sync_with(state, host, code, port=SYNC_PORT, timeout=10):
+    reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port, limit=STREAM_LIMIT), timeout)
+    return await asyncio.wait_for(sync_client(state, reader, writer, code), timeout)
+
+
+# --------------------------------------------------
+# Loopback stand-in
+# --------------------------------------------------
+
+class _PipeWriter:
+    def __init__(self, reader):
+        self.reader = reader
+
+    def write(self, data):
+        self.reader.feed_data(data)
+
+    async def drain(self):
+        await asyncio.sleep(0)
+
+    def close(self):
+        if not self.reader.at_eof():
+            self.reader.feed_eof()
+
+    async def wait_closed(self):
+        pass
+
+
+def loopback_pair():
+    """Two connected (reader, writer) ends that never touch a socket."""
+    a = asyncio.StreamReader(limit=STREAM_LIMIT)
+    b = asyncio.StreamReader(limit=STREAM_LIMIT)
+    return (a, _PipeWriter(b)), (b, _PipeWriter(a))
+
+
+async def sync_loopback(client_state, server_state, code="loopback", server_code=None):
+    (cr, cw), (sr, sw) = loopback_pair()
+    result, _ = await asyncio.gather(
+        sync_client(client_state, cr, cw, code),
+        handle_sync(server_state, sr, sw, code if server_code is None else server_code),)
+    return result
@@ -0,0 +1,30 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from charts import cumulative_series
+from history import retotal_rounds
+
+
+class EditedSeriesTest(unittest.TestCase):
+    def test_series_end_at_totals(self):
+        # Saved by an edit that renamed Ann and changed her total but kept the rounds
+        game = {"totals": {"Anne": 130, "Bo": 20}, "rounds": [["Ann", 30], ["Bo", 20]]}
+        series = cumulative_series(game)
+        self.assertEqual(sorted(series), ["Anne", "Bo"])
+        self.assertEqual(series["Anne"][-1], (2, 130))
+        self.assertEqual(series["Bo"][-1], (2, 20))
+
+    def test_retotal_rounds_renames_and_adjusts(self):
+        totals = {"Anne": 130, "Bo": 20}
+        rounds = retotal_rounds([("Ann", 30), ("Bo", 20), ("Cy", 5)], totals, {"Ann": "Anne"})
+        self.assertEqual(rounds, [("Anne", 30), ("Bo", 20), ("Anne", 100)])
+        series = cumulative_series({"totals": totals, "rounds": rounds})
+        self.assertEqual(series["Anne"], [(0, 0), (1, 30), (3, 130)])
+        self.assertEqual(series["Bo"], [(0, 0), (2, 20), (3, 20)])
+
+
+if __name__ == "__main__":
+    unittest.main()
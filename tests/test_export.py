@@ -0,0 +1,61 @@
+import csv
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from export import ROW_FIELDS, export_csv, export_parquet
+from history import HistoryStore
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:
+    pq = None
+
+
+def game(day, **totals):
+    return {"date": f"2024-01-{day:02d}T20:00:00", "totals": totals,
+            "winner": max(totals, key=totals.get), "finished": True,
+            "rounds": [[name, pts] for name, pts in totals.items()]}
+
+
+class ExportTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.games_path = os.path.join(self.dir, "games.dom")
+        HistoryStore(self.games_path).apply(
+            [game(1, ann=10, bob=20), game(2, ann=5, cat=15, dan=0)], [])
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def csv_rows(self):
+        path = os.path.join(self.dir, "games.csv")
+        self.assertEqual(export_csv(self.games_path, path), 5)
+        with open(path, newline="", encoding="utf-8") as f:
+            reader = csv.reader(f)
+            self.assertEqual(next(reader), list(ROW_FIELDS))
+            return [(d, gid, p, int(s), w, int(r)) for d, gid, p, s, w, r in reader]
+
+    def test_csv(self):
+        rows = self.csv_rows()
+        self.assertEqual(rows[0], ("2024-01-01", "2024-01-01T20:00:00", "ann", 10, "bob", 2))
+        self.assertEqual(len(rows), 5)
+
+    @unittest.skipIf(pq is None, "pyarrow not installed (desktop-only export)")
+    def test_parquet_matches_csv(self):
+        path = os.path.join(self.dir, "games.parquet")
+        # A row group smaller than the export exercises the flushes
+        self.assertEqual(export_parquet(self.games_path, path, row_group=2), 5)
+        table = pq.read_table(path)
+        self.assertEqual(table.column_names, list(ROW_FIELDS))
+        self.assertEqual(pq.ParquetFile(path).num_row_groups, 3)
+        self.assertEqual([tuple(r.values()) for r in table.to_pylist()], self.csv_rows())
+        self.assertFalse(os.path.exists(f"{path}.tmp"))
+
+
+if __name__ == "__main__":
+    unittest.main()
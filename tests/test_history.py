@@ -0,0 +1,138 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from history import DateIndex, HistoryStore, encode_record
+
+
+def game(day):
+    return {"date": f"2024-01-{day:02d}T20:00:00", "totals": {"Ann": day}, "winner": "Ann",
+            "finished": True}
+
+
+class TornTailTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, "games.dom")
+        HistoryStore(self.path).apply([game(1), game(2), game(3)], [])
+        # A whole delete and half of another, with no commit: a crash mid-write
+        with open(self.path, "ab") as f:
+            f.write(encode_record({"op": "del", "id": game(1)["date"]}))
+            f.write(encode_record({"op": "del", "id": game(2)["date"]})[:20])
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def check_save_after_torn_tail(self, store):
+        self.assertTrue(store.save(game(4)))
+        reloaded = HistoryStore(self.path)
+        self.assertEqual(sorted(reloaded.load()), sorted(game(d)["date"] for d in (1, 2, 3, 4)))
+        self.assertFalse(reloaded.corrupt)
+
+    def test_save_from_mapped_view(self):
+        self.check_save_after_torn_tail(HistoryStore(self.path))
+
+    def test_save_after_full_load(self):
+        store = HistoryStore(self.path)
+        store.load()
+        self.assertFalse(store.corrupt)
+        self.check_save_after_torn_tail(store)
+
+
+class LateDamageTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, "games.dom")
+        store = HistoryStore(self.path)
+        store.apply([game(1), game(2)], [])
+        # Index the file first, so the damage lands in bytes it already covers
+        self.assertEqual(store.count(), 2)
+        store.mapped.index.save()
+        st = os.stat(self.path)
+        with open(self.path, "rb") as f:
+            data = f.read()
+        with open(self.path, "r+b") as f:
+            f.write(data.replace(b"2024-01-01", b"2024-01-0X", 1))
+        # Bit rot leaves the mtime alone, so the index still looks current
+        os.utime(self.path, ns=(st.st_atime_ns, st.st_mtime_ns))
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def test_reads_notice_damage(self):
+        store = HistoryStore(self.path)
+        self.assertFalse(store.corrupt)
+        self.assertEqual([g["date"] for g in store.latest(5)], [game(2)["date"]])
+        self.assertTrue(store.corrupt)
+
+    def test_scan_notices_damage(self):
+        store = HistoryStore(self.path)
+        self.assertEqual(len(store.scan()), 1)
+        self.assertEqual(store.count(), 2)
+        self.assertTrue(store.corrupt)
+        self.assertEqual(store.recover(), 1)
+        self.assertFalse(store.corrupt)
+        self.assertEqual(store.scan(), [])
+
+    def test_torn_tail_is_not_damage(self):
+        HistoryStore(self.path).recover()
+        with open(self.path, "ab") as f:
+            f.write(encode_record({"op": "del", "id": game(1)["date"]})[:20])
+        self.assertEqual(HistoryStore(self.path).scan(), [])
+
+
+class OverwrittenInPlaceTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, "games.dom")
+        self.store = HistoryStore(self.path)
+        self.store.apply([game(d) for d in range(1, 21)], [])
+        self.assertEqual(self.store.count(), 20)
+        self.store.mapped.index.save()
+        # Another device's larger history copied over games.dom, same inode
+        other = os.path.join(self.dir, "other.dom")
+        self.imported = [dict(game(1), date=f"2025-02-{d:02d}T20:00:00") for d in range(1, 29)]
+        self.imported += [dict(game(1), date=f"2025-03-{d:02d}T20:00:00") for d in range(1, 23)]
+        HistoryStore(other).apply(self.imported, [])
+        with open(other, "rb") as src, open(self.path, "r+b") as dst:
+            dst.write(src.read())
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def check(self, store):
+        self.assertEqual(store.count(), 50)
+        newest = sorted((g["date"] for g in self.imported), reverse=True)[:5]
+        self.assertEqual([g["date"] for g in store.latest(5)], newest)
+        self.assertFalse(store.corrupt)
+
+    def test_reload_reindexes(self):
+        self.store.reload()
+        self.store.release()
+        self.check(self.store)
+        self.check(HistoryStore(self.path))
+
+    def test_stale_sidecar_is_not_taken_for_an_append(self):
+        self.check(HistoryStore(self.path))
+
+
+class DateIndexTest(unittest.TestCase):
+    def test_latest_page_follows_writes(self):
+        store = HistoryStore(None)
+        dates = DateIndex()
+        dates.attach(store)
+        store.games = {game(d)["date"]: game(d) for d in (3, 1, 2)}
+        dates.ensure_built(store)
+        self.assertEqual(dates.latest(2), [game(3)["date"], game(2)["date"]])
+        dates.on_history_change([game(5), game(4)], [game(3)["date"]])
+        self.assertEqual(dates.latest(3), [game(d)["date"] for d in (5, 4, 2)])
+        self.assertEqual(len(dates), 4)
+        self.assertEqual(dates.latest(0), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from history import HistoryStore
+from report import merge, parse_export
+
+
+def game(day):
+    return {"date": f"2024-01-{day:02d}T20:00:00", "totals": {"Ann": day, "Bo": 1},
+            "winner": "Ann", "finished": True}
+
+
+class SalvageReportTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def path(self, name):
+        return os.path.join(self.dir, name)
+
+    def test_healthy_exports_are_not_listed(self):
+        with open(self.path("games-a.dom"), "w") as f:
+            json.dump([game(1), game(2)], f)
+        HistoryStore(self.path("games-b.dom")).apply([game(3)], [])
+        _, stats = merge(parse_export(self.path(n)) for n in ("games-a.dom", "games-b.dom"))
+        self.assertEqual(stats["damaged_files"], [])
+
+    def test_skipped_regions_are_listed(self):
+        with open(self.path("games-a.dom"), "w") as f:
+            f.write("[" + json.dumps(game(1)) + ', {"date": "2024-01-02T2###, ' + json.dumps(game(3)) + "]")
+        HistoryStore(self.path("games-b.dom")).apply([game(4), game(5)], [])
+        with open(self.path("games-b.dom"), "rb") as f:
+            data = f.read()
+        with open(self.path("games-b.dom"), "wb") as f:
+            f.write(data.replace(b"2024-01-04", b"2024-01-0X", 1))
+
+        games, stats = merge(parse_export(self.path(n)) for n in ("games-a.dom", "games-b.dom"))
+        self.assertEqual(sorted(games), [game(d)["date"] for d in (1, 3, 5)])
+        damaged = {os.path.basename(d["path"]): d for d in stats["damaged_files"]}
+        self.assertEqual(sorted(damaged), ["games-a.dom", "games-b.dom"])
+        for d in damaged.values():
+            self.assertEqual(d["regions"], 1)
+            self.assertGreater(d["bytes"], 0)
+            self.assertIsNone(d["error"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,44 @@
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import Player
+from store import PlayerStore
+
+
+class ImportRosterTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, "players.dom")
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def test_reset_lets_an_imported_file_replace_the_roster(self):
+        store = PlayerStore(self.path)
+        players = {"Ann": Player("Ann"), "Bo": Player("Bo")}
+        store.save_all(players)
+        # Local patches since the last save: Ann renamed away, Cy added
+        store.remove("Ann", players)
+        store.put(Player("Cy", 1, 0), players)
+
+        # Another device's export copied over players.dom
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump({"version": 1, "players": {
+                "Ann": {"wins": 4, "losses": 1}, "Dee": {"wins": 0, "losses": 2}}}, f)
+        # Without a reset the local journal lands on the imported roster
+        self.assertEqual(sorted(PlayerStore(self.path).load()), ["Cy", "Dee"])
+
+        store.reset()
+        players = PlayerStore(self.path).load()
+        self.assertEqual(sorted(players), ["Ann", "Dee"])
+        self.assertEqual((players["Ann"].wins, players["Ann"].losses), (4, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
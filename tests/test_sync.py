@@ -0,0 +1,125 @@
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from history import HistoryStore
+from sync import SyncHost, SyncState, sync_loopback, sync_with
+
+
+def game(date, **totals):
+    return {"date": date, "totals": totals, "winner": None, "finished": False}
+
+
+class SyncTestCase(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.a = self.device("a")
+        self.b = self.device("b")
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def device(self, name):
+        base = os.path.join(self.dir, name)
+        os.makedirs(base)
+        history = HistoryStore(os.path.join(base, "games.dom"))
+        return SyncState(os.path.join(base, "sync.dom"), history)
+
+    def sync(self, client, server, **kwargs):
+        return asyncio.run(sync_loopback(client, server, **kwargs))
+
+    def games(self, state):
+        # Fresh store so what is compared is what reached the disk
+        return HistoryStore(state.history.path).load()
+
+
+class LoopbackSyncTest(SyncTestCase):
+    def test_edit_and_delete_converge(self):
+        self.a.history.apply([game("2026-01-01T10:00:00", ann=10, bob=20),
+                              game("2026-01-02T10:00:00", ann=5, cat=15)], [])
+        self.sync(self.a, self.b)
+        self.assertEqual(self.games(self.a), self.games(self.b))
+
+        self.a.history.save(game("2026-01-01T10:00:00", ann=110, bob=20))
+        self.b.history.delete(["2026-01-02T10:00:00"])
+        self.sync(self.a, self.b)
+        self.sync(self.b, self.a)
+
+        expected = {"2026-01-01T10:00:00": game("2026-01-01T10:00:00", ann=110, bob=20)}
+        self.assertEqual(self.games(self.a), expected)
+        self.assertEqual(self.games(self.b), expected)
+        # Nothing left to exchange once converged
+        self.assertEqual(self.sync(self.a, self.b), (0, 0))
+
+    def test_wrong_pairing_code_changes_nothing(self):
+        self.a.history.save(game("2026-01-01T10:00:00", ann=10, bob=20))
+        self.b.history.save(game("2026-01-03T10:00:00", cat=1, dan=2))
+        with self.assertRaises(PermissionError):
+            self.sync(self.a, self.b, code="111111", server_code="222222")
+        self.assertEqual(list(self.games(self.b)), ["2026-01-03T10:00:00"])
+        self.assertEqual(list(self.games(self.a)), ["2026-01-01T10:00:00"])
+
+
+class SyncHostTest(SyncTestCase):
+    def host(self, peers, **kwargs):
+        """Run a host for self.b and let ``peers(port)`` connect to it."""
+        host = SyncHost(self.b, code="123456", **kwargs)
+
+        async def run():
+            serving = asyncio.ensure_future(host.serve("127.0.0.1", 0))
+            while host.port is None:
+                await asyncio.sleep(0.01)
+            results = await peers(host.port)
+            return results, await serving
+
+        return host, asyncio.run(run())
+
+    async def attempt(self, port, code):
+        try:
+            return await sync_with(self.a, "127.0.0.1", code, port=port, timeout=5)
+        except (PermissionError, OSError, asyncio.IncompleteReadError) as e:
+            return type(e).__name__
+
+    def test_code_is_spent_by_one_sync(self):
+        self.a.history.save(game("2026-01-01T10:00:00", ann=10, bob=20))
+
+        async def peers(port):
+            first = await self.attempt(port, "123456")
+            return first, await self.attempt(port, "123456")
+
+        host, ((first, second), synced) = self.host(peers)
+        self.assertEqual(first, (0, 1))
+        self.assertTrue(synced)
+        self.assertIsNone(host.code)
+        # The server has closed, or refuses the spent code
+        self.assertIn(second, ("ConnectionRefusedError", "PermissionError", "IncompleteReadError"))
+        self.assertEqual(list(self.games(self.b)), ["2026-01-01T10:00:00"])
+
+    def test_wrong_codes_close_the_server(self):
+        self.a.history.save(game("2026-01-01T10:00:00", ann=10, bob=20))
+
+        async def peers(port):
+            return [await self.attempt(port, f"{n:06d}") for n in range(3)]
+
+        host, (results, synced) = self.host(peers, max_denied=3)
+        self.assertEqual(results, ["PermissionError"] * 3)
+        self.assertFalse(synced)
+        self.assertIsNone(host.code)
+        self.assertEqual(self.games(self.b), {})
+
+    def test_timeout_ends_hosting(self):
+        async def peers(port):
+            return None
+
+        host, (_, synced) = self.host(peers, timeout=0.1)
+        self.assertFalse(synced)
+        self.assertIsNone(host.code)
+
+
+if __name__ == "__main__":
+    unittest.main()
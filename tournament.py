@@ -0,0 +1,192 @@
+import logging
+import random
+from datetime import datetime, timedelta
+
+from models import GameScore, Player
+from store import RecordLog
+
+
+# --------------------------------------------------
+# Tournament
+# --------------------------------------------------
+
+def _record_key(record):
+    if record.get("kind") == "table":
+        return f"table:{record['table']}"
+    return "meta"
+
+
+class Table:
+    # Many tables are live at once, so keep each one small: no instance
+    # dict, and the game shares Player objects with the app roster.
+    __slots__ = ("number", "game", "round", "done")
+
+    def __init__(self, number, game, round_no, done=False):
+        self.number = number
+        self.game = game
+        self.round = round_no
+        self.done = done
+
+    def to_dict(self):
+        return {
+            "kind": "table",
+            "table": self.number,
+            "round": self.round,
+            "done": self.done,
+            "game": self.game.to_dict(),}
+
+    @classmethod
+    def from_dict(cls, data, players):
+        game = GameScore.from_dict(data["game"], players)
+        return cls(data["table"], game, data.get("round", 1), data.get("done", False))
+
+
+class Tournament:
+    def __init__(self, path, players, roster, seats=2):
+        self.log = RecordLog(path, key=_record_key)
+        self.players = players
+        self.roster = list(roster)
+        self.seats = max(2, seats)
+        self.round = 0
+        self.tables = {}
+        # name -> [match points, points scored]
+        self.standings = {name: [0, 0] for name in self.roster}
+        self.met = set()
+        self.byes = []
+
+    # ---------- persistence ----------
+
+    def meta(self):
+        return {
+            "kind": "meta",
+            "round": self.round,
+            "seats": self.seats,
+            "roster": self.roster,
+            "standings": self.standings,
+            "met": sorted(sorted(pair) for pair in self.met),
+            "byes": self.byes,}
+
+    @classmethod
+    def load(cls, path, players):
+        log = RecordLog(path, key=_record_key)
+        records = log.load()
+        meta = records.pop("meta", None)
+        if not meta:
+            return None
+        t = cls(path, players, meta.get("roster", []), meta.get("seats", 2))
+        t.log = log
+        t.round = meta.get("round", 0)
+        t.standings.update({k: list(v) for k, v in meta.get("standings", {}).items()})
+        t.met = {frozenset(pair) for pair in meta.get("met", [])}
+        t.byes = meta.get("byes", [])
+        for record in records.values():
+            try:
+                table = Table.from_dict(record, players)
+            except Exception:
+                logging.warning(f"Skipping invalid tournament table: {record.get('table')}")
+                continue
+            if table.round == t.round:
+                t.tables[table.number] = table
+        return t
+
+    def save_table(self, number):
+        table = self.tables.get(number)
+        if table is None:
+            return
+        self.log.append(table.to_dict())
+        if self.log.needs_compaction(len(self.tables) + 1):
+            self.save_all()
+
+    def save_all(self):
+        records = [self.meta()] + [t.to_dict() for t in self.tables.values()]
+        self.log.compact(records)
+
+    def clear(self):
+        self.log.clear()
+        self.tables.clear()
+
+    # ---------- rounds ----------
+
+    def round_complete(self):
+        return all(t.done for t in self.tables.values())
+
+    def finish_table(self, number):
+        table = self.tables.get(number)
+        if table is None or table.done:
+            return
+        game = table.game
+        game.finished = True
+        winner = game.winner()
+        for name, score in game.totals.items():
+            row = self.standings.setdefault(name, [0, 0])
+            row[1] += score
+            if name == winner:
+                row[0] += 1
+        names = list(game.totals)
+        for i, a in enumerate(names):
+            for b in names[i + 1:]:
+                self.met.add(frozenset((a, b)))
+        table.done = True
+        self.log.append(table.to_dict(), self.meta())
+
+    def ranking(self):
+        return sorted(
+            self.roster,
+            key=lambda n: (self.standings[n][0], self.standings[n][1]),
+            reverse=True,)
+
+    def pairings(self):
+        if self.round == 0:
+            order = self.roster[:]
+            random.shuffle(order)
+        else:
+            order = self.ranking()
+
+        # With heads-up tables an odd player out gets a bye, lowest ranked
+        # first among those who have not had one yet.
+        bye = []
+        if len(order) % 2 == 1 and self.seats == 2:
+            candidates = [n for n in reversed(order) if n not in self.byes] or order[-1:]
+            bye = [candidates[0]]
+            order.remove(bye[0])
+
+        groups = []
+        pool = order
+        while pool:
+            size = min(self.seats, len(pool))
+            # Avoid a trailing table of one by shrinking this one
+            if len(pool) - size == 1 and size > 2:
+                size -= 1
+            seat = [pool[0]]
+            rest = pool[1:]
+            for name in list(rest):
+                if len(seat) == size:
+                    break
+                if not any(frozenset((name, s)) in self.met for s in seat):
+                    seat.append(name)
+                    rest.remove(name)
+            while len(seat) < size:
+                seat.append(rest.pop(0))
+            groups.append(seat)
+            pool = rest
+        return groups, bye
+
+    def next_round(self):
+        if self.tables and not self.round_complete():
+            return False
+        groups, bye = self.pairings()
+        self.round += 1
+        self.tables = {}
+        dates = set()
+        for number, names in enumerate(groups, start=1):
+            game = GameScore([self.players.get(n) or Player(n) for n in names])
+            # Game dates double as IDs in games.dom, so keep them distinct
+            while game.date in dates:
+                game.date = (datetime.fromisoformat(game.date) + timedelta(microseconds=1)).isoformat()
+            dates.add(game.date)
+            self.tables[number] = Table(number, game, self.round)
+        for name in bye:
+            self.byes.append(name)
+            self.standings[name][0] += 1
+        self.save_all()
+        return True